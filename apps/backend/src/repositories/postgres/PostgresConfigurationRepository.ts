@@ -3,6 +3,9 @@ import { IConfigurationRepository, ConfigurationFilters } from '../interfaces/IC
 import { Configuration } from '../../models/Configuration';
 import type { NumericRange } from '@sky-light/shared-types';
 
+// Hashes per config_blobs lookup, keeping the request URL short
+const BLOB_LOOKUP_CHUNK_SIZE = 100;
+
 export class PostgresConfigurationRepository implements IConfigurationRepository {
   private supabase: SupabaseClient;
 
@@ -37,7 +40,9 @@ export class PostgresConfigurationRepository implements IConfigurationRepository
     
     const { data, error } = await query;
     if (error) throw new Error(`Failed to fetch configurations: ${error.message}`);
-    return (data || []).map(this.mapToConfiguration);
+    const rows = data || [];
+    const blobParams = await this.fetchBlobParams(rows);
+    return rows.map((row) => this.mapToConfiguration(row, blobParams));
   }
 
   async findById(id: string): Promise<Configuration | null> {
@@ -46,7 +51,8 @@ export class PostgresConfigurationRepository implements IConfigurationRepository
       if (error.code === 'PGRST116') return null;
       throw new Error(`Failed to fetch configuration: ${error.message}`);
     }
-    return data ? this.mapToConfiguration(data) : null;
+    if (!data) return null;
+    return this.mapToConfiguration(data, await this.fetchBlobParams([data]));
   }
 
   async findByDatasetId(datasetId: string, filters?: ConfigurationFilters): Promise<Configuration[]> {
@@ -67,14 +73,35 @@ export class PostgresConfigurationRepository implements IConfigurationRepository
     return data || [];
   }
   
-  private mapToConfiguration(row: any): Configuration {
+  /**
+   * Params of configurations stored content-addressed (upload.py --config-blobs),
+   * keyed by hash. Looked up separately rather than embedded, so databases
+   * without the config_blobs table keep working.
+   */
+  private async fetchBlobParams(rows: any[]): Promise<Map<string, unknown>> {
+    const hashes = [...new Set(
+      rows.filter((row) => row.additional_params == null && row.params_hash).map((row) => row.params_hash as string)
+    )];
+    const params = new Map<string, unknown>();
+    for (let start = 0; start < hashes.length; start += BLOB_LOOKUP_CHUNK_SIZE) {
+      const { data, error } = await this.supabase
+        .from('config_blobs')
+        .select('hash, params')
+        .in('hash', hashes.slice(start, start + BLOB_LOOKUP_CHUNK_SIZE));
+      if (error) throw new Error(`Failed to fetch config blobs: ${error.message}`);
+      for (const blob of data || []) params.set(blob.hash, blob.params);
+    }
+    return params;
+  }
+
+  private mapToConfiguration(row: any, blobParams: Map<string, unknown>): Configuration {
     return {
       id: row.id,
       baselineId: row.baseline_id,
       datasetId: row.dataset_id,
       llmId: row.llm_id,
       targetSparsity: row.target_sparsity,
-      additionalParams: row.additional_params,
+      additionalParams: row.additional_params ?? blobParams.get(row.params_hash),
       createdAt: new Date(row.created_at),
       updatedAt: new Date(row.updated_at),
     };
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request latency with and without the shared pooled HTTP client.
+
+A threaded HTTP/1.1 server on localhost answers `GET /rest/v1/<table>` after
+a fixed delay. Opening a connection costs an extra `--handshake-ms`, which
+stands in for the TCP and TLS handshakes to a remote Supabase project.
+The same sequence of small PostgREST requests is sent through:
+
+- a fresh connection per request (no keep-alive),
+- a supabase client with library defaults,
+- a supabase client from utils.http_client (pooled keep-alive).
+
+Usage:
+    python benchmarks/bench_http_client.py [--requests 500] [--latency-ms 5] \\
+                                           [--handshake-ms 30] [--threads 1 8]
+"""
+
+import sys
+import time
+import socket
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from supabase import ClientOptions, create_client
+
+from utils.http_client import create_http_client, create_supabase_client
+
+# Any three-part token is accepted by the client; the stub ignores it
+STUB_KEY = 'stub.stub.stub'
+
+
+def make_stub_handler(latency_seconds: float, handshake_seconds: float, connections: list):
+    """Build a handler that charges handshake time per connection and latency per request."""
+
+    class StubPostgrestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            # Headers and body are written separately; without this, delayed
+            # ACKs would add ~40 ms to every request on a kept-alive connection
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connections.append(self.client_address)
+            time.sleep(handshake_seconds)
+
+        def do_GET(self):
+            time.sleep(latency_seconds)
+            body = b'[{"id":"00000000-0000-0000-0000-000000000000"}]'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubPostgrestHandler
+
+
+def start_stub_server(latency_seconds: float, handshake_seconds: float):
+    """Start the stand-in server on a free localhost port; returns (server, connection log)."""
+    connections = []
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0), make_stub_handler(latency_seconds, handshake_seconds, connections)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, connections
+
+
+def run(client, num_requests: int, threads: int) -> float:
+    """Send the requests from `threads` threads; returns mean milliseconds per request."""
+    def query(i):
+        client.table('benchmarks').select('id').eq('name', f'bench-{i}').execute()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(query, range(num_requests)))
+    return (time.perf_counter() - started) * 1000 * threads / num_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pooled HTTP client against a local stub')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per configuration')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Stub server latency per request')
+    parser.add_argument('--handshake-ms', type=float, default=30.0,
+                        help='Extra delay when a connection is opened (emulates TCP+TLS setup)')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8], help='Concurrent senders to measure')
+    args = parser.parse_args()
+
+    server, connections = start_stub_server(args.latency_ms / 1000, args.handshake_ms / 1000)
+    host, port = server.server_address
+    url = f'http://{host}:{port}'
+
+    clients = {
+        'no keep-alive': lambda: create_client(url, STUB_KEY, options=ClientOptions(
+            httpx_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=0))
+        )),
+        'library default': lambda: create_client(url, STUB_KEY),
+        'pooled': lambda: create_supabase_client(url, STUB_KEY, http_client=create_http_client()),
+    }
+
+    print(f"{args.requests} requests, {args.latency_ms:.0f} ms stub latency, "
+          f"{args.handshake_ms:.0f} ms per new connection")
+    print(f"{'client':>16} {'threads':>8} {'ms/request':>11} {'connections':>12} {'saved':>8}")
+    for threads in args.threads:
+        baseline = None
+        for name, make_client in clients.items():
+            client = make_client()
+            connections.clear()
+            ms_per_request = run(client, args.requests, threads)
+            baseline = baseline or ms_per_request
+            print(f"{name:>16} {threads:>8} {ms_per_request:>11.1f} {len(connections):>12} "
+                  f"{baseline - ms_per_request:>6.1f}ms")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
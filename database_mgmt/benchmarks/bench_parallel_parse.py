@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-process vs multi-process JSONL parsing.
+
+A synthetic file is generated from a template JSONL file (by default
+`experiments.jsonl`) and parsed once with the streaming reader and then with
+ParallelJsonlReader at increasing worker counts.
+
+Usage:
+    python benchmarks/bench_parallel_parse.py [--records 200000] [--workers 1 2 4 8] \\
+                                              [--template experiments.jsonl]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_streaming import DEFAULT_TEMPLATE, generate_file
+from utils.jsonl_reader import iter_jsonl
+from utils.parallel_jsonl import ParallelJsonlReader, JSON_BACKEND
+
+
+def time_serial(path: Path) -> float:
+    start = time.perf_counter()
+    for _ in iter_jsonl(str(path)):
+        pass
+    return time.perf_counter() - start
+
+
+def time_parallel(path: Path, workers: int) -> float:
+    start = time.perf_counter()
+    for _ in ParallelJsonlReader(str(path), workers=workers):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark multi-process JSONL parsing')
+    parser.add_argument('--records', type=int, default=200000, help='Records in the generated file')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Worker counts to measure')
+    parser.add_argument('--template', type=str, default=str(DEFAULT_TEMPLATE),
+                        help='JSONL file whose records are cycled to build the input')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'bench_parse.jsonl'
+        generate_file(Path(args.template), args.records, path)
+        file_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{args.records} records, {file_mb:.1f} MB, {os.cpu_count()} CPUs, parallel backend: {JSON_BACKEND}")
+        print(f"{'mode':>12} {'seconds':>8} {'MB/s':>8} {'speedup':>8}")
+
+        baseline = time_serial(path)
+        print(f"{'serial':>12} {baseline:>8.2f} {file_mb / baseline:>8.1f} {1:>7.1f}x")
+        for workers in args.workers:
+            elapsed = time_parallel(path, workers)
+            print(f"{f'{workers} workers':>12} {elapsed:>8.2f} {file_mb / elapsed:>8.1f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark result throughput of COPY ingestion against REST-style JSON batches.
+
+Both paths write the same rows into a scratch copy of the `results` table
+(same columns, unique key and indexes, no foreign keys) on a real PostgreSQL
+server, through ResultBatchWriter as upload.py does:
+
+- json: one `INSERT … SELECT FROM json_populate_recordset(…) ON CONFLICT`
+  per batch of --json-batch-rows, the statement PostgREST runs for an
+  upsert, plus --latency-ms per request for the HTTP round trip,
+- copy: utils.pg_copy COPY into a staging table and one set-based merge per
+  batch of --copy-batch-rows, as with upload.py --pg-dsn.
+
+Usage:
+    python benchmarks/bench_pg_copy.py --pg-dsn postgresql://postgres@localhost/postgres \\
+                                       [--rows 200000] [--latency-ms 0] [--concurrency 4]
+"""
+
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.pg_copy import PgCopyLoader
+from utils.result_writer import ResultBatchWriter
+
+SCRATCH_TABLE = 'bench_pg_copy_results'
+
+RESULT_KEY = ('configuration_id', 'dataset_metric_id', 'experimental_run_id')
+
+
+def create_scratch_table(loader: PgCopyLoader):
+    """(Re)create the scratch results table."""
+    conn = loader.connection()
+    conn.execute(f'DROP TABLE IF EXISTS {SCRATCH_TABLE}')
+    conn.execute(f'''
+        CREATE TABLE {SCRATCH_TABLE} (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            configuration_id UUID NOT NULL,
+            dataset_metric_id UUID NOT NULL,
+            experimental_run_id UUID,
+            value DECIMAL(15,6) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(configuration_id, dataset_metric_id, experimental_run_id)
+        )
+    ''')
+    for column in ('configuration_id', 'dataset_metric_id', 'experimental_run_id', 'value'):
+        conn.execute(f'CREATE INDEX ON {SCRATCH_TABLE} ({column})')
+
+
+def make_rows(count: int):
+    """Result rows spread over configurations the way an upload produces them."""
+    run_id = str(uuid.uuid4())
+    dataset_metric_ids = [str(uuid.uuid4()) for _ in range(30)]
+    rows = []
+    while len(rows) < count:
+        config_id = str(uuid.uuid4())
+        for dataset_metric_id in random.sample(dataset_metric_ids, 4):
+            rows.append({
+                'configuration_id': config_id,
+                'dataset_metric_id': dataset_metric_id,
+                'experimental_run_id': run_id,
+                'value': round(random.uniform(0, 100), 6),
+            })
+    return rows[:count]
+
+
+def json_batch_writer(loader: PgCopyLoader, latency_seconds: float):
+    """Write a batch the way PostgREST executes an upsert of a JSON body."""
+    query = f'''
+        INSERT INTO {SCRATCH_TABLE} (configuration_id, dataset_metric_id, experimental_run_id, value)
+        SELECT configuration_id, dataset_metric_id, experimental_run_id, value
+        FROM json_populate_recordset(NULL::{SCRATCH_TABLE}, %s)
+        ON CONFLICT (configuration_id, dataset_metric_id, experimental_run_id)
+        DO UPDATE SET value = EXCLUDED.value
+    '''
+
+    def write(batch):
+        time.sleep(latency_seconds)
+        loader.connection().execute(query, (json.dumps(batch),))
+    return write
+
+
+def copy_batch_writer(loader: PgCopyLoader):
+    def write(batch):
+        loader.merge(SCRATCH_TABLE, batch, conflict_target=RESULT_KEY, update=True)
+    return write
+
+
+def run(write_batch, rows, batch_rows: int, concurrency: int) -> float:
+    """Push the rows through ResultBatchWriter; returns rows per second."""
+    writer = ResultBatchWriter(write_batch, concurrency=concurrency, batch_size=batch_rows)
+    try:
+        writer.submit(rows)
+        writer.drain()
+    finally:
+        writer.close()
+    return writer.rows_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark COPY ingestion against REST-style JSON batches')
+    parser.add_argument('--pg-dsn', required=True, help='PostgreSQL to write the scratch table to')
+    parser.add_argument('--rows', type=int, default=200_000, help='Result rows per path')
+    parser.add_argument('--json-batch-rows', type=int, default=500, help='Rows per JSON batch (upload.py caps at 500)')
+    parser.add_argument('--copy-batch-rows', type=int, default=10_000, help='Rows per COPY batch')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='HTTP round trip added per JSON batch (0 = database time only)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Batches in flight')
+    args = parser.parse_args()
+
+    loader = PgCopyLoader(args.pg_dsn)
+    rows = make_rows(args.rows)
+    print(f"{args.rows} rows, concurrency {args.concurrency}, "
+          f"{args.latency_ms:.0f} ms added per JSON batch")
+    print(f"{'path':>6} {'rows/batch':>11} {'rows/sec':>10}")
+
+    try:
+        baseline = None
+        for name, write_batch, batch_rows in (
+            ('json', json_batch_writer(loader, args.latency_ms / 1000), args.json_batch_rows),
+            ('copy', copy_batch_writer(loader), args.copy_batch_rows),
+        ):
+            create_scratch_table(loader)
+            rows_per_second = run(write_batch, rows, batch_rows, args.concurrency)
+            baseline = baseline or rows_per_second
+            print(f"{name:>6} {batch_rows:>11} {rows_per_second:>10.0f}  ({rows_per_second / baseline:.1f}x)")
+    finally:
+        loader.connection().execute(f'DROP TABLE IF EXISTS {SCRATCH_TABLE}')
+        loader.close()
+
+
+if __name__ == '__main__':
+    main()
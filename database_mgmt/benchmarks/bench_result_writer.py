@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark result-batch throughput against a local PostgREST stand-in.
+
+A threaded HTTP server on localhost accepts `POST /rest/v1/results` and
+answers after a fixed delay, emulating the round-trip latency of a remote
+Supabase project. Result rows are pushed through ResultBatchWriter with a
+real supabase client at increasing concurrency levels; with --engine async,
+through AsyncResultBatchWriter and the async client on one event loop.
+
+Usage:
+    python benchmarks/bench_result_writer.py [--rows 4000] [--latency-ms 25] \\
+                                             [--concurrency 1 2 4 8 16] [--adaptive] \\
+                                             [--engine threads async]
+"""
+
+import sys
+import time
+import uuid
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from supabase import create_client
+
+from utils.result_writer import ResultBatchWriter, AsyncResultBatchWriter
+from utils.adaptive_batcher import AdaptiveBatchSizer
+from utils.async_engine import EventLoopThread
+from utils.http_client import create_async_http_client, create_async_supabase_client
+
+# Any three-part token is accepted by the client; the stub ignores it
+STUB_KEY = 'stub.stub.stub'
+
+
+def make_stub_handler(latency_seconds: float):
+    """Build a request handler that sleeps for the given latency, then returns an empty list."""
+
+    class StubPostgrestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency_seconds)
+            body = b'[]'
+            self.send_response(201)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubPostgrestHandler
+
+
+def start_stub_server(latency_seconds: float) -> ThreadingHTTPServer:
+    """Start the stand-in server on a free localhost port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_stub_handler(latency_seconds))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_rows(num_rows: int):
+    """Build result rows shaped like the ones upload.py sends."""
+    run_id = str(uuid.uuid4())
+    return [
+        {
+            'configuration_id': str(uuid.uuid4()),
+            'dataset_metric_id': str(uuid.uuid4()),
+            'experimental_run_id': run_id,
+            'value': i * 0.5,
+        }
+        for i in range(num_rows)
+    ]
+
+
+def run(client, rows, concurrency: int, batch_size: int, adaptive: bool, engine: EventLoopThread = None):
+    """Write all rows and return (rows/sec, batch size description); async client when engine is given."""
+    sizer = AdaptiveBatchSizer(initial_rows=batch_size) if adaptive else None
+    if engine is None:
+        writer = ResultBatchWriter(
+            lambda batch: client.table('results').upsert(batch).execute(),
+            concurrency=concurrency,
+            batch_size=batch_size,
+            sizer=sizer
+        )
+    else:
+        async def write_batch(batch):
+            await client.table('results').upsert(batch).execute()
+        writer = AsyncResultBatchWriter(
+            write_batch,
+            engine,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            sizer=sizer
+        )
+    try:
+        writer.submit(rows)
+        writer.drain()
+    finally:
+        writer.close()
+    return writer.rows_per_second, writer.sizer.describe()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent result-batch writes')
+    parser.add_argument('--rows', type=int, default=4000, help='Result rows per run')
+    parser.add_argument('--batch-size', type=int, default=20, help='Rows per request')
+    parser.add_argument('--latency-ms', type=float, default=25.0, help='Stub server latency per request')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                        help='Concurrency levels to measure')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Size batches adaptively, starting from --batch-size')
+    parser.add_argument('--engine', choices=('threads', 'async'), nargs='+', default=['threads'],
+                        help='Writers to measure: thread pool and/or asyncio event loop')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.latency_ms / 1000)
+    host, port = server.server_address
+    url = f'http://{host}:{port}'
+    rows = make_rows(args.rows)
+
+    print(f"{args.rows} rows, {args.batch_size} rows/request, {args.latency_ms:.0f} ms stub latency")
+    print(f"{'engine':>8} {'concurrency':>11} {'rows/sec':>10} {'speedup':>8}  batch size")
+    baseline = None
+    for engine_name in args.engine:
+        engine = None
+        if engine_name == 'async':
+            engine = EventLoopThread()
+            http_client = create_async_http_client(pool_size=max(args.concurrency))
+            client = engine.run(create_async_supabase_client(url, STUB_KEY, http_client))
+        else:
+            client = create_client(url, STUB_KEY)
+        for concurrency in args.concurrency:
+            rows_per_second, batch_size = run(client, rows, concurrency, args.batch_size, args.adaptive, engine)
+            baseline = baseline or rows_per_second
+            print(f"{engine_name:>8} {concurrency:>11} {rows_per_second:>10.0f} "
+                  f"{rows_per_second / baseline:>7.1f}x  {batch_size}")
+        if engine is not None:
+            engine.run(http_client.aclose())
+            engine.close()
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak RSS and throughput of list-based vs streaming JSONL ingestion.
+
+Synthetic files of increasing size are generated from a template JSONL file
+(by default `experiments.jsonl`). Each measurement runs in a fresh
+subprocess so its peak RSS is not polluted by earlier runs.
+
+Usage:
+    python benchmarks/bench_streaming.py [--sizes 10000 50000 200000] \\
+                                         [--template experiments.jsonl]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.jsonl_reader import iter_jsonl
+
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent.parent / 'experiments.jsonl'
+
+
+def generate_file(template: Path, num_records: int, out_path: Path):
+    """Write `num_records` records cycling through the template lines."""
+    with open(template, 'r', encoding='utf-8') as f:
+        templates = [json.loads(line) for line in f if line.strip()]
+
+    with open(out_path, 'w', encoding='utf-8') as out:
+        for i in range(num_records):
+            record = dict(templates[i % len(templates)])
+            record['density_target'] = round((i % 10000) / 100, 2)
+            out.write(json.dumps(record) + '\n')
+
+
+def touch_record(record, seen):
+    """Read the fields the uploader uses, keeping only distinct entity names."""
+    seen.add((record['baseline'], record['model_name'], record['benchmark'], record['dataset']))
+    return len(record.get('benchmark_metrics', {}))
+
+
+def run_worker(mode: str, path: str):
+    """Ingest `path` in the given mode and print a JSON measurement."""
+    start = time.perf_counter()
+    seen = set()
+    num_records = 0
+
+    if mode == 'list':
+        records = list(iter_jsonl(path))
+        for record in records:
+            touch_record(record, seen)
+        for record in records:
+            num_records += 1
+    else:
+        # Same two passes the uploader makes: entity discovery, then processing
+        for record in iter_jsonl(path):
+            touch_record(record, seen)
+        for record in iter_jsonl(path):
+            num_records += 1
+
+    elapsed = time.perf_counter() - start
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'records': num_records,
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss_kb / 1024,
+    }))
+
+
+def measure(mode: str, path: Path) -> dict:
+    """Run one measurement in a fresh interpreter."""
+    output = subprocess.check_output(
+        [sys.executable, __file__, '--worker', mode, str(path)], text=True
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming JSONL ingestion')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000],
+                        help='Number of records per generated file')
+    parser.add_argument('--template', type=str, default=str(DEFAULT_TEMPLATE),
+                        help='JSONL file whose records are cycled to build the inputs')
+    parser.add_argument('--worker', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    print(f"{'records':>10} {'file MB':>9} {'mode':>7} {'peak RSS MB':>12} {'records/s':>11} {'MB/s':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            path = Path(tmp_dir) / f'bench_{size}.jsonl'
+            generate_file(Path(args.template), size, path)
+            file_mb = os.path.getsize(path) / (1024 * 1024)
+            for mode in ('list', 'stream'):
+                result = measure(mode, path)
+                print(f"{size:>10} {file_mb:>9.1f} {mode:>7} {result['peak_rss_mb']:>12.1f} "
+                      f"{result['records'] / result['seconds']:>11.0f} "
+                      f"{file_mb / result['seconds']:>8.1f}")
+            path.unlink()
+
+
+if __name__ == '__main__':
+    main()
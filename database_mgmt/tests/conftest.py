@@ -0,0 +1,66 @@
+"""Shared fixtures: uploads against FakePostgrest, and small JSONL inputs."""
+
+import sys
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+
+# upload.py imports its helpers as `utils.*`, relative to database_mgmt
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import upload  # noqa: E402
+from fake_postgrest import FakePostgrest  # noqa: E402
+from support import RECORD_COUNT, SUPABASE_URL, make_record, write_jsonl  # noqa: E402
+
+
+@pytest.fixture
+def postgrest(monkeypatch) -> FakePostgrest:
+    """FakePostgrest serving every uploader created in the test."""
+    fake = FakePostgrest()
+    monkeypatch.setattr(upload, 'shared_http_client', lambda **pool_options: fake.client())
+    monkeypatch.setattr(upload, 'create_async_http_client', lambda **pool_options: fake.async_client())
+    return fake
+
+
+@pytest.fixture
+def small_flushes(monkeypatch):
+    """Flush results every 10 records, so a small file is journaled several times."""
+    monkeypatch.setattr(upload, 'RECORD_CHUNK_SIZE', 10)
+    monkeypatch.setattr(upload, 'RESULT_FLUSH_MIN_ROWS', 1)
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retry at once instead of waiting out the backoff."""
+    monkeypatch.setattr(upload.RetryPolicy, 'delay', lambda self, retry: 0.0)
+
+
+@pytest.fixture
+def records_file(tmp_path) -> Path:
+    return write_jsonl(tmp_path / 'records.jsonl', [make_record(index) for index in range(RECORD_COUNT)])
+
+
+@pytest.fixture
+def manifest_path(tmp_path) -> Path:
+    return tmp_path / 'manifest.sqlite3'
+
+
+@pytest.fixture(params=[upload.SupabaseUploader, upload.AsyncSupabaseUploader], ids=['threads', 'async'])
+def run_upload(request, postgrest, manifest_path):
+    """
+    Upload a file with a new uploader sharing the manifest, once per engine.
+
+    Returns (uploader, records uploaded).
+
+    Batches are fixed at 5 rows, one in flight, with no retries or prefetch,
+    so the requests of an upload are the same on every run.
+    """
+    def run(path: Path, **overrides) -> Tuple[upload.SupabaseUploader, int]:
+        uploader = request.param(SUPABASE_URL, 'key', manifest_path=str(manifest_path))
+        options = upload.UploadOptions(
+            experimental_run_name='test', prefetch=False, batch_size=5, concurrency=1, retry_attempts=1
+        )
+        return uploader, uploader.upload_data(str(path), options, **overrides)
+    return run
+
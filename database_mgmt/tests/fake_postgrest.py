@@ -0,0 +1,213 @@
+"""
+In-memory PostgREST for the upload tests.
+
+FakePostgrest is an httpx transport handler: the real supabase client sends
+its requests to it, so the tests exercise the same request building, body
+encoding and error handling as an upload against Supabase. It implements
+the subset upload.py uses: filtered and paged selects, exact counts,
+inserts/upserts with on_conflict, duplicate resolution and unique keys, and
+filtered deletes (without ON DELETE cascades).
+
+Set `fail` to drop or answer requests, e.g. to take a table offline
+mid-upload or refuse some rows, `lose_response` to lose the response of a
+write that was applied, and pass `missing_tables` for a database without an
+optional migration.
+"""
+
+import csv
+import json
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import httpx
+
+# Unique keys per table; the first is what FakePostgrest.keys returns
+UNIQUE_KEYS: Dict[str, List[Tuple[str, ...]]] = {
+    'benchmarks': [('name',)],
+    'datasets': [('benchmark_id', 'name')],
+    'metrics': [('name',)],
+    'dataset_metrics': [('dataset_id', 'metric_id')],
+    'baselines': [('name',)],
+    'llms': [('name',)],
+    'configurations': [('baseline_id', 'dataset_id', 'llm_id', 'target_sparsity')],
+    'config_blobs': [('hash',)],
+    'results': [('configuration_id', 'dataset_metric_id', 'experimental_run_id')],
+}
+
+# Primary key column, where it is not `id`
+PRIMARY_KEYS = {'config_blobs': 'hash'}
+
+
+def _text(value: Any) -> str:
+    """A stored value as PostgREST filters spell it."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def error_response(status: int, code: str, message: str) -> httpx.Response:
+    """An error response with the fields PostgREST always sends."""
+    return httpx.Response(status, json={'code': code, 'message': message, 'details': None, 'hint': None})
+
+
+def _matcher(column: str, expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """Row predicate for one filter query parameter, e.g. name=in.(a,b)."""
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[len('not.'):]
+    operator, _, operand = expression.partition('.')
+    if operator == 'in':
+        wanted = set(next(csv.reader([operand[1:-1]], quotechar='"', escapechar='\\'))) if operand != '()' else set()
+        test = lambda row: _text(row.get(column)) in wanted
+    elif operator == 'is':
+        test = lambda row: _text(row.get(column)) == operand
+    elif operator in ('eq', 'neq'):
+        test = lambda row: (_text(row.get(column)) == operand) == (operator == 'eq')
+    else:
+        raise ValueError(f"Unsupported filter {column}={expression}")
+    return (lambda row: not test(row)) if negate else test
+
+
+class FakePostgrest:
+    """Tables held in memory, served over the PostgREST HTTP interface."""
+
+    def __init__(self, missing_tables: Iterable[str] = ()):
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # Tables the database does not have, answered like PostgREST does
+        self.missing_tables = set(missing_tables)
+        # (method, table) of every request received
+        self.requests: List[Tuple[str, str]] = []
+        # Called with each request before it is served; True drops it like a
+        # lost connection, and a response is sent instead of serving it
+        self.fail: Optional[Callable[[httpx.Request, str], Union[bool, httpx.Response]]] = None
+        # Called with each request after it was served; True drops the response
+        self.lose_response: Optional[Callable[[httpx.Request, str], bool]] = None
+        self._lock = threading.Lock()
+
+    def client(self) -> httpx.Client:
+        return httpx.Client(transport=httpx.MockTransport(self))
+
+    def async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self))
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self.tables[table]]
+
+    def keys(self, table: str) -> List[Tuple[Any, ...]]:
+        """The unique key of every row, e.g. to check that no result was stored twice."""
+        key = UNIQUE_KEYS[table][0]
+        return [tuple(row.get(column) for column in key) for row in self.rows(table)]
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        table = request.url.path.rsplit('/', 1)[-1]
+        with self._lock:
+            self.requests.append((request.method, table))
+            failure = self.fail(request, table) if self.fail is not None else None
+            if isinstance(failure, httpx.Response):
+                return failure
+            if failure:
+                raise httpx.ConnectError('network unreachable', request=request)
+            response = self._serve(request, table)
+            if self.lose_response is not None and self.lose_response(request, table):
+                raise httpx.ReadError('connection reset after the request was applied', request=request)
+            return response
+
+    def _serve(self, request: httpx.Request, table: str) -> httpx.Response:
+        if table in self.missing_tables:
+            return error_response(404, 'PGRST205', f"Could not find the table 'public.{table}' in the schema cache")
+        if request.method in ('GET', 'HEAD'):
+            return self._select(request, table)
+        if request.method == 'POST':
+            return self._insert(request, table)
+        if request.method == 'DELETE':
+            return self._delete(request, table)
+        return httpx.Response(405, json={'message': f'{request.method} not supported by FakePostgrest'})
+
+    def _filter(self, request: httpx.Request, table: str) -> Tuple[List[Dict[str, Any]], Optional[httpx.Response]]:
+        """Rows matching the request's filters, or the error response for a column the table lacks."""
+        rows = list(self.tables[table])
+        for column, expression in request.url.params.multi_items():
+            if column in ('select', 'order', 'offset', 'limit', 'columns', 'on_conflict'):
+                continue
+            if column == 'id' and PRIMARY_KEYS.get(table, 'id') != 'id':
+                return [], error_response(400, '42703', f'column {table}.id does not exist')
+            rows = [row for row in rows if _matcher(column, expression)(row)]
+        return rows, None
+
+    def _select(self, request: httpx.Request, table: str) -> httpx.Response:
+        params = request.url.params
+        rows, error = self._filter(request, table)
+        if error is not None:
+            return error
+        total = len(rows)
+        if 'order' in params:
+            column, _, direction = params['order'].partition('.')
+            rows.sort(key=lambda row: _text(row.get(column)), reverse=direction == 'desc')
+        offset = int(params.get('offset', 0))
+        rows = rows[offset:offset + int(params['limit'])] if 'limit' in params else rows[offset:]
+
+        headers = {'content-range': f"*/{total}"}
+        if request.method == 'HEAD':
+            return httpx.Response(200, headers=headers)
+        return httpx.Response(200, json=self._project(rows, params.get('select')), headers=headers)
+
+    def _insert(self, request: httpx.Request, table: str) -> httpx.Response:
+        params = request.url.params
+        prefer = request.headers.get('prefer', '')
+        body = json.loads(request.content)
+        primary_key = PRIMARY_KEYS.get(table, 'id')
+        conflict_target = tuple(params['on_conflict'].split(',')) if 'on_conflict' in params else (primary_key,)
+        upsert = 'resolution=' in prefer
+
+        staged = [dict(row) for row in self.tables[table]]
+        written = []
+        for row in body if isinstance(body, list) else [body]:
+            row = dict(row)
+            if primary_key == 'id':
+                row.setdefault('id', str(uuid.uuid4()))
+            existing = next((other for other in staged if self._conflicts(other, row, conflict_target)), None)
+            if existing is not None and upsert:
+                if 'resolution=merge-duplicates' in prefer:
+                    existing.update({column: value for column, value in row.items() if column != primary_key})
+                    written.append(existing)
+                continue
+            if existing is not None or any(
+                self._conflicts(other, row, key) for key in UNIQUE_KEYS.get(table, []) for other in staged
+            ):
+                return error_response(409, '23505', f'duplicate key value violates unique constraint on {table}')
+            staged.append(row)
+            written.append(row)
+
+        self.tables[table] = staged
+        if 'return=minimal' in prefer:
+            return httpx.Response(201)
+        return httpx.Response(201, json=self._project(written, params.get('select')))
+
+    def _delete(self, request: httpx.Request, table: str) -> httpx.Response:
+        rows, error = self._filter(request, table)
+        if error is not None:
+            return error
+        deleted = {id(row) for row in rows}
+        self.tables[table] = [row for row in self.tables[table] if id(row) not in deleted]
+        headers = {'content-range': f"*/{len(rows)}"}
+        if 'return=minimal' in request.headers.get('prefer', ''):
+            return httpx.Response(204, headers=headers)
+        return httpx.Response(200, json=[dict(row) for row in rows], headers=headers)
+
+    @staticmethod
+    def _conflicts(row: Dict[str, Any], other: Dict[str, Any], key: Tuple[str, ...]) -> bool:
+        return all(column in other for column in key) and all(
+            _text(row.get(column)) == _text(other.get(column)) for column in key
+        )
+
+    @staticmethod
+    def _project(rows: List[Dict[str, Any]], select: Optional[str]) -> List[Dict[str, Any]]:
+        if not select or select == '*':
+            return [dict(row) for row in rows]
+        columns = [column.strip().strip('"') for column in select.split(',')]
+        return [{column: row.get(column) for column in columns} for row in rows]
@@ -0,0 +1,46 @@
+"""Synthetic JSONL inputs for the upload tests, and readers of the state an upload leaves."""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List
+
+from utils.checkpoint import default_checkpoint_path
+
+SUPABASE_URL = 'http://postgrest.test'
+
+# Records in the records_file fixture, and results made per record by make_record
+RECORD_COUNT = 40
+RESULTS_PER_RECORD = 2
+
+
+def make_record(index: int) -> Dict[str, Any]:
+    """A record with a configuration of its own and two results."""
+    return {
+        'baseline': f'baseline-{index % 3}',
+        'model_name': f'org/model-{index % 2}',
+        'benchmark': 'bench',
+        'dataset': f'dataset-{index % 4}',
+        'density_target': round(0.01 * (index + 1), 2),
+        'config': {'index': index},
+        'overall_score': float(index),
+        'benchmark_metrics': {'accuracy': index / 100},
+    }
+
+
+def write_jsonl(path: Path, records: List[Dict[str, Any]], mode: str = 'w') -> Path:
+    with open(path, mode, encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    return path
+
+
+def read_journal(jsonl_path: Path) -> Dict[str, Any]:
+    """The checkpoint journal kept next to an input file."""
+    return json.loads(default_checkpoint_path(str(jsonl_path)).read_text())
+
+
+def manifest_rows(manifest_path: Path) -> int:
+    """Line hashes the manifest holds as uploaded."""
+    with sqlite3.connect(manifest_path) as conn:
+        return conn.execute('SELECT COUNT(*) FROM uploaded_lines').fetchone()[0]
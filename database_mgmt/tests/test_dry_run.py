@@ -0,0 +1,27 @@
+"""Dry runs: the analysis of the input, and no requests."""
+
+import json
+import math
+from pathlib import Path
+
+from support import RECORD_COUNT, make_record, write_jsonl
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+def test_analysis_json_matches_fixture(run_upload, postgrest, tmp_path):
+    records = [make_record(index) for index in range(RECORD_COUNT)]
+    records[3]['benchmark_metrics']['accuracy'] = math.nan
+    records[4]['aux_memory'] = 9223372036854775807
+    del records[5]['dataset']
+    path = write_jsonl(tmp_path / 'records.jsonl', records)
+    analysis_path = tmp_path / 'analysis.json'
+
+    _, analyzed = run_upload(path, dry_run=True, analysis_json=str(analysis_path))
+
+    assert analyzed == RECORD_COUNT
+    assert postgrest.requests == []
+    analysis = json.loads(analysis_path.read_text())
+    # Files are keyed by the path given, which differs per test run
+    analysis['records_per_file'] = {Path(name).name: count for name, count in analysis['records_per_file'].items()}
+    assert analysis == json.loads((FIXTURES / 'analysis.json').read_text())
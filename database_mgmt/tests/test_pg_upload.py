@@ -0,0 +1,142 @@
+"""
+PostgresUploader (--pg-dsn) against a real PostgreSQL server.
+
+Skipped unless UPLOAD_TEST_PG_DSN names a database whose user may create
+databases: each test loads DB_Schema.md into a scratch database of its own
+and drops it afterwards.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+import upload
+from support import RECORD_COUNT, RESULTS_PER_RECORD, make_record, write_jsonl
+
+psycopg = pytest.importorskip('psycopg')
+
+PG_DSN = os.environ.get('UPLOAD_TEST_PG_DSN')
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / 'DB_Schema.md'
+
+pytestmark = pytest.mark.skipif(not PG_DSN, reason='set UPLOAD_TEST_PG_DSN to run the PostgreSQL tests')
+
+
+@pytest.fixture
+def pg_dsn():
+    """DSN of a scratch database holding the schema of DB_Schema.md."""
+    name = f"upload_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(PG_DSN, autocommit=True) as admin:
+        admin.execute(f'CREATE DATABASE "{name}"')
+    dsn = psycopg.conninfo.make_conninfo(PG_DSN, dbname=name)
+    try:
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            conn.execute(SCHEMA_PATH.read_text())
+        yield dsn
+    finally:
+        with psycopg.connect(PG_DSN, autocommit=True) as admin:
+            admin.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+
+
+def count(dsn: str, table: str) -> int:
+    with psycopg.connect(dsn) as conn:
+        return conn.execute(f'SELECT count(*) FROM {table}').fetchone()[0]
+
+
+def read_rejects(path: Path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+@pytest.fixture
+def run_pg_upload(pg_dsn, tmp_path):
+    """Upload a file with a new PostgresUploader built with `settings`; returns (uploader, records uploaded)."""
+    def run(path: Path, **settings):
+        uploader = upload.PostgresUploader(pg_dsn, **settings)
+        options = upload.UploadOptions(
+            experimental_run_name='test', prefetch=False, batch_size=5, concurrency=1, retry_attempts=1,
+            reject_path=str(tmp_path / 'rejects.jsonl')
+        )
+        return uploader, uploader.upload_data(str(path), options)
+    return run
+
+
+def test_fresh_upload(run_pg_upload, pg_dsn, records_file, tmp_path):
+    _, uploaded = run_pg_upload(records_file)
+
+    assert uploaded == RECORD_COUNT
+    assert count(pg_dsn, 'results') == RECORD_COUNT * RESULTS_PER_RECORD
+    assert count(pg_dsn, 'configurations') == RECORD_COUNT
+    assert count(pg_dsn, 'experimental_runs') == 1
+    assert read_rejects(tmp_path / 'rejects.jsonl') == []
+
+
+def test_reupload_reuses_entities_and_configurations(run_pg_upload, pg_dsn, records_file):
+    run_pg_upload(records_file)
+    entities = {table: count(pg_dsn, table) for table in ('benchmarks', 'datasets', 'llms', 'configurations')}
+
+    # A second upload creates a run of its own, referencing the stored configurations
+    _, uploaded = run_pg_upload(records_file)
+
+    assert uploaded == RECORD_COUNT
+    assert {table: count(pg_dsn, table) for table in entities} == entities
+    assert count(pg_dsn, 'experimental_runs') == 2
+    assert count(pg_dsn, 'results') == 2 * RECORD_COUNT * RESULTS_PER_RECORD
+
+
+def test_deterministic_reupload_overwrites_results(run_pg_upload, pg_dsn, records_file):
+    run_pg_upload(records_file, deterministic_ids=True)
+    changed = [make_record(index) for index in range(RECORD_COUNT)]
+    changed[0]['overall_score'] = -1.0
+    write_jsonl(records_file, changed)
+
+    run_pg_upload(records_file, deterministic_ids=True)
+
+    assert count(pg_dsn, 'experimental_runs') == 1
+    assert count(pg_dsn, 'results') == RECORD_COUNT * RESULTS_PER_RECORD
+    with psycopg.connect(pg_dsn) as conn:
+        assert conn.execute('SELECT count(*) FROM results WHERE value = -1').fetchone()[0] == 1
+
+
+def test_duplicate_result_key_is_rejected_as_over_rest(run_pg_upload, pg_dsn, tmp_path):
+    # Record 0 twice in one run: the second copy's results are refused, not merged
+    path = write_jsonl(tmp_path / 'records.jsonl', [make_record(index) for index in range(10)] + [make_record(0)])
+
+    run_pg_upload(path)
+
+    assert count(pg_dsn, 'results') == 10 * RESULTS_PER_RECORD
+    rejects = read_rejects(tmp_path / 'rejects.jsonl')
+    assert len(rejects) == RESULTS_PER_RECORD
+    assert {reject['code'] for reject in rejects} == {'23505'}
+
+
+def test_foreign_key_violation_is_bisected_into_reject_file(run_pg_upload, pg_dsn, records_file, tmp_path):
+    uploader, _ = run_pg_upload(records_file)
+    # The stored results again, in a second run, with one referencing a configuration that does not exist
+    run_id = uploader.create_experimental_run('second')
+    with psycopg.connect(pg_dsn) as conn:
+        stored = conn.execute('SELECT configuration_id, dataset_metric_id, value FROM results').fetchall()
+    rows = [
+        {'configuration_id': str(configuration_id), 'dataset_metric_id': str(dataset_metric_id),
+         'experimental_run_id': run_id, 'value': value}
+        for configuration_id, dataset_metric_id, value in stored
+    ]
+    rows[7]['configuration_id'] = str(uuid.uuid4())
+
+    try:
+        failed = uploader.batch_insert_results(
+            [tuple(row.get(column) for column in uploader.result_columns) for row in rows], batch_size=len(rows)
+        )
+    finally:
+        uploader.reject_file.close()
+        uploader.pg.close()
+
+    assert not failed
+    with psycopg.connect(pg_dsn) as conn:
+        assert conn.execute(
+            'SELECT count(*) FROM results WHERE experimental_run_id = %s', [run_id]
+        ).fetchone()[0] == len(rows) - 1
+    rejects = read_rejects(tmp_path / 'rejects.jsonl')
+    assert [reject['row']['configuration_id'] for reject in rejects] == [rows[7]['configuration_id']]
+    assert rejects[0]['code'] == '23503'
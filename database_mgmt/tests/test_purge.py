@@ -0,0 +1,93 @@
+"""Purging uploaded data, in full or per experimental run."""
+
+import pytest
+
+import upload
+from support import RECORD_COUNT, RESULTS_PER_RECORD, SUPABASE_URL, make_record, write_jsonl
+
+UPLOADED_TABLES = (
+    'results', 'configurations', 'dataset_metrics', 'datasets', 'experimental_runs',
+    'metrics', 'baselines', 'llms', 'benchmarks',
+)
+
+
+@pytest.fixture
+def purger(postgrest):
+    return upload.SupabaseUploader(SUPABASE_URL, 'key')
+
+
+@pytest.fixture
+def two_runs(run_upload, postgrest, records_file, tmp_path):
+    """
+    Runs 'first' and 'second' with RECORD_COUNT records each, plus one result
+    left without a run (as ON DELETE SET NULL leaves them).
+
+    Returns {run name: run id}.
+    """
+    more_records = write_jsonl(
+        tmp_path / 'more.jsonl', [make_record(RECORD_COUNT + index) for index in range(RECORD_COUNT)]
+    )
+    first, _ = run_upload(records_file, experimental_run_name='first')
+    second, _ = run_upload(more_records, experimental_run_name='second')
+    orphan = dict(postgrest.tables['results'][0], id='orphan', experimental_run_id=None)
+    postgrest.tables['results'].append(orphan)
+    return {'first': first.experimental_run_id, 'second': second.experimental_run_id}
+
+
+def results_of(postgrest, run_id):
+    return [row for row in postgrest.rows('results') if row['experimental_run_id'] == run_id]
+
+
+def test_full_purge_without_config_blobs_table(run_upload, postgrest, records_file, purger):
+    run_upload(records_file)
+    postgrest.missing_tables.add('config_blobs')
+
+    deleted = purger.purge_previous_runs()
+
+    assert deleted['config_blobs'] == 0
+    for table in UPLOADED_TABLES:
+        assert postgrest.rows(table) == [], table
+    assert deleted['results'] > 0 and deleted['configurations'] > 0
+
+
+def test_full_purge_empties_config_blobs(run_upload, postgrest, records_file, purger):
+    run_upload(records_file)
+    # config_blobs is keyed by hash and has no id column
+    postgrest.tables['config_blobs'].extend({'hash': f'hash-{n}', 'params': {'index': n}} for n in range(3))
+
+    deleted = purger.purge_previous_runs()
+
+    assert deleted['config_blobs'] == 3
+    assert postgrest.rows('config_blobs') == []
+
+
+@pytest.mark.parametrize('by', ['name', 'id'])
+def test_purge_runs_keeps_other_runs_and_orphaned_results(two_runs, postgrest, purger, by):
+    configurations = len(postgrest.rows('configurations'))
+
+    deleted = purger.purge_previous_runs(['first' if by == 'name' else two_runs['first']])
+
+    assert deleted == {'results': RECORD_COUNT * RESULTS_PER_RECORD, 'experimental_runs': 1}
+    assert results_of(postgrest, two_runs['first']) == []
+    assert len(results_of(postgrest, two_runs['second'])) == RECORD_COUNT * RESULTS_PER_RECORD
+    assert len(results_of(postgrest, None)) == 1
+    assert [row['name'] for row in postgrest.rows('experimental_runs')] == ['second']
+    assert len(postgrest.rows('configurations')) == configurations
+
+
+def test_purge_runs_of_unknown_run_deletes_nothing(two_runs, postgrest, purger, capsys):
+    results = len(postgrest.rows('results'))
+
+    assert purger.purge_previous_runs(['no-such-run']) == {}
+
+    assert len(postgrest.rows('results')) == results
+    assert 'Warning: No experimental run no-such-run' in capsys.readouterr().out
+
+
+def test_full_purge_deletes_orphaned_results(two_runs, postgrest, purger):
+    deleted = purger.purge_previous_runs()
+
+    # Both runs' results and the one without a run
+    assert deleted['results'] == 2 * RECORD_COUNT * RESULTS_PER_RECORD + 1
+    for table in UPLOADED_TABLES:
+        assert postgrest.rows(table) == [], table
@@ -0,0 +1,95 @@
+"""Spooling result batches that cannot be written, and replaying them."""
+
+import httpx
+import pytest
+
+import upload
+from support import RECORD_COUNT, RESULTS_PER_RECORD, SUPABASE_URL, manifest_rows, read_journal
+from utils.result_rows import RESULT_COLUMNS
+from utils.result_spool import ResultSpool
+
+ALL_RESULTS = RECORD_COUNT * RESULTS_PER_RECORD
+
+
+def results_unreachable(request, table):
+    return table == 'results'
+
+
+@pytest.fixture
+def spool_path(tmp_path):
+    return tmp_path / 'results.spool.sqlite3'
+
+
+@pytest.fixture
+def spooled_upload(run_upload, postgrest, records_file, spool_path):
+    """An upload whose every result batch was spooled because the results table was unreachable."""
+    postgrest.fail = results_unreachable
+    run_upload(records_file, spool_path=str(spool_path))
+    postgrest.fail = None
+
+
+def replay(spool_path) -> int:
+    uploader = upload.SupabaseUploader(SUPABASE_URL, 'key')
+    # Spooled batches are joined into chunks of 10 rows, sent as two requests
+    return uploader.replay_spool(str(spool_path), concurrency=2, batch_size=5, retry_attempts=1)
+
+
+def pending(spool_path):
+    spool = ResultSpool(spool_path, SUPABASE_URL)
+    try:
+        return spool.pending()
+    finally:
+        spool.close()
+
+
+def test_spooled_batches_count_as_committed(spooled_upload, postgrest, records_file, spool_path, manifest_path):
+    assert postgrest.rows('results') == []
+    assert pending(spool_path)[1] == ALL_RESULTS
+    assert read_journal(records_file)['records_done'] == RECORD_COUNT
+    assert manifest_rows(manifest_path) == RECORD_COUNT
+
+
+def test_replay_skips_rows_already_stored(spooled_upload, postgrest, spool_path):
+    # The first spooled batch was applied after all, despite the lost response
+    spool = ResultSpool(spool_path, SUPABASE_URL)
+    _, columns, rows = next(spool.iter_batches())
+    spool.close()
+    assert columns == RESULT_COLUMNS
+    postgrest.tables['results'].extend(dict(zip(columns, row), id=f'applied-{n}') for n, row in enumerate(rows))
+
+    # Stored rows are skipped, not refused and rejected
+    assert replay(spool_path) == ALL_RESULTS
+
+    keys = postgrest.keys('results')
+    assert len(keys) == len(set(keys)) == ALL_RESULTS
+    assert pending(spool_path) == (0, 0)
+
+
+def test_replay_twice_stores_each_result_once(spooled_upload, postgrest, spool_path):
+    assert replay(spool_path) == ALL_RESULTS
+    assert replay(spool_path) == 0
+
+    keys = postgrest.keys('results')
+    assert len(keys) == len(set(keys)) == ALL_RESULTS
+
+
+def test_interrupted_replay_resumes_without_duplicates(spooled_upload, postgrest, spool_path):
+    # The connection drops after three replay requests
+    before = len(postgrest.requests)
+    postgrest.fail = lambda request, table: (
+        table == 'results' and sum(1 for _, name in postgrest.requests[before:] if name == 'results') > 3
+    )
+    with pytest.raises(httpx.ConnectError):
+        replay(spool_path)
+    written = len(postgrest.rows('results'))
+    remaining = pending(spool_path)[1]
+    # Half of the interrupted chunk was written but is still spooled
+    assert written + remaining == ALL_RESULTS + 5
+    postgrest.fail = None
+
+    # and is skipped by the next replay
+    assert replay(spool_path) == remaining
+
+    keys = postgrest.keys('results')
+    assert len(keys) == len(set(keys)) == ALL_RESULTS
+    assert pending(spool_path) == (0, 0)
@@ -0,0 +1,91 @@
+"""Result values the results.value column would refuse, quarantined before upload."""
+
+import json
+import math
+
+import pytest
+
+from support import RECORD_COUNT, RESULTS_PER_RECORD, make_record, write_jsonl
+from utils.reject_file import RejectFile
+from utils.result_values import ValueQuarantine, check_result_value, fits_result_value
+
+# The largest value DECIMAL(15,6) holds, and the smallest that rounds past it
+LARGEST_STORED = 999999999.999999
+ROUNDS_PAST_LIMIT = 999999999.9999996
+
+# Sentinel some records carry for aux_memory
+INT64_MAX = 9223372036854775807
+
+
+@pytest.mark.parametrize('value, reason', [
+    (0.5, None),
+    (-3, None),
+    (LARGEST_STORED, None),
+    (-LARGEST_STORED, None),
+    (math.nan, 'NaN'),
+    (math.inf, 'infinite'),
+    (-math.inf, 'infinite'),
+    ('0.5', 'not a number (str)'),
+    (True, 'not a number (bool)'),
+    (None, 'missing'),
+    (ROUNDS_PAST_LIMIT, 'out of range for DECIMAL(15,6)'),
+    (-ROUNDS_PAST_LIMIT, 'out of range for DECIMAL(15,6)'),
+    (INT64_MAX, 'out of range for DECIMAL(15,6)'),
+])
+def test_check_result_value(value, reason):
+    assert check_result_value(value) == reason
+    # The fast path never admits a value the full check refuses
+    assert not fits_result_value(value) or reason is None
+
+
+def test_quarantine_counts_per_metric_and_records_reason(tmp_path):
+    reject_file = RejectFile(tmp_path / 'rejects.jsonl')
+    quarantine = ValueQuarantine(reject_file)
+
+    admitted = [
+        quarantine.admit(metric, value, lambda: {'configuration_id': 'c', 'value': value})
+        for metric, value in [
+            ('accuracy', 0.5), ('accuracy', math.nan), ('accuracy', 'n/a'), ('aux_memory', INT64_MAX)
+        ]
+    ]
+    reject_file.close()
+
+    assert admitted == [True, False, False, False]
+    assert quarantine.total == 3
+    assert quarantine.describe() == ['accuracy: 2', 'aux_memory: 1']
+    rejects = [json.loads(line) for line in (tmp_path / 'rejects.jsonl').read_text().splitlines()]
+    assert [(reject['row']['metric'], reject['error']) for reject in rejects] == [
+        ('accuracy', 'quarantined: NaN'),
+        ('accuracy', 'quarantined: not a number (str)'),
+        ('aux_memory', 'quarantined: out of range for DECIMAL(15,6)'),
+    ]
+
+
+def test_upload_quarantines_refused_values(run_upload, postgrest, tmp_path, capsys):
+    records = [make_record(index) for index in range(RECORD_COUNT)]
+    records[0]['benchmark_metrics']['accuracy'] = math.nan
+    records[1]['benchmark_metrics']['accuracy'] = math.inf
+    records[2]['benchmark_metrics']['accuracy'] = 'n/a'
+    records[3]['overall_score'] = ROUNDS_PAST_LIMIT
+    records[4]['aux_memory'] = INT64_MAX
+    # JSON as Python writes it, NaN and Infinity included
+    path = write_jsonl(tmp_path / 'records.jsonl', records)
+    reject_path = tmp_path / 'rejects.jsonl'
+
+    uploader, uploaded = run_upload(path, reject_path=str(reject_path))
+
+    assert uploaded == RECORD_COUNT
+    assert len(postgrest.rows('results')) == RECORD_COUNT * RESULTS_PER_RECORD - 4
+    assert dict(uploader.quarantine.counts) == {'accuracy': 3, 'overall_score': 1, 'aux_memory': 1}
+    rejects = [json.loads(line) for line in reject_path.read_text().splitlines()]
+    assert sorted((reject['row']['metric'], reject['error']) for reject in rejects) == [
+        ('accuracy', 'quarantined: NaN'),
+        ('accuracy', 'quarantined: infinite'),
+        ('accuracy', 'quarantined: not a number (str)'),
+        ('aux_memory', 'quarantined: out of range for DECIMAL(15,6)'),
+        ('overall_score', 'quarantined: out of range for DECIMAL(15,6)'),
+    ]
+    assert (
+        f"Result values quarantined before upload: 5 (accuracy: 3, overall_score: 1, aux_memory: 1; "
+        f"written to {reject_path})"
+    ) in capsys.readouterr().out
@@ -0,0 +1,106 @@
+"""Retrying, bisecting and force-pushing result batches during an upload."""
+
+import json
+
+import httpx
+import pytest
+from postgrest import APIError
+
+from fake_postgrest import error_response
+from support import RECORD_COUNT, RESULTS_PER_RECORD, make_record, read_journal, write_jsonl
+from utils.retry import is_transient
+
+ALL_RESULTS = RECORD_COUNT * RESULTS_PER_RECORD
+
+# overall_score of the record whose result the database refuses
+REFUSED_VALUE = -7.25
+
+pytestmark = pytest.mark.usefixtures('no_backoff')
+
+
+def results_posts(postgrest) -> int:
+    return sum(1 for request in postgrest.requests if request == ('POST', 'results'))
+
+
+def read_rejects(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+@pytest.mark.parametrize('error, transient', [
+    (httpx.ConnectError('unreachable'), True),
+    (httpx.ReadTimeout('timed out'), True),
+    (APIError({'message': 'Service Unavailable', 'code': 503}), True),
+    (APIError({'message': 'Too Many Requests', 'code': '429'}), True),
+    (APIError({'message': 'Bad Request', 'code': '400'}), False),
+    (APIError({'message': 'pool timeout', 'code': 'PGRST003'}), True),
+    (APIError({'message': 'statement timeout', 'code': '57014'}), True),
+    (APIError({'message': 'deadlock detected', 'code': '40P01'}), True),
+    (APIError({'message': 'foreign key violation', 'code': '23503'}), False),
+    (APIError({'message': 'duplicate key', 'code': '23505'}), False),
+    (ValueError('not a request error'), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_503_succeeds_on_retry(run_upload, postgrest, records_file, tmp_path):
+    postgrest.fail = lambda request, table: (
+        error_response(503, 'PGRST001', 'database unavailable')
+        if table == 'results' and results_posts(postgrest) == 1 else False
+    )
+
+    uploader, uploaded = run_upload(records_file, retry_attempts=3, reject_path=str(tmp_path / 'rejects.jsonl'))
+
+    assert uploaded == RECORD_COUNT
+    assert uploader.retry.retries == 1
+    keys = postgrest.keys('results')
+    assert len(keys) == len(set(keys)) == ALL_RESULTS
+    assert read_rejects(tmp_path / 'rejects.jsonl') == []
+
+
+def test_refused_row_is_bisected_into_reject_file(run_upload, postgrest, tmp_path):
+    records = [make_record(index) for index in range(RECORD_COUNT)]
+    records[7]['overall_score'] = REFUSED_VALUE
+    path = write_jsonl(tmp_path / 'records.jsonl', records)
+    # As the database refuses a row referencing a configuration deleted meanwhile
+    postgrest.fail = lambda request, table: (
+        error_response(409, '23503', 'insert or update on table "results" violates foreign key constraint')
+        if table == 'results' and f'"value":{REFUSED_VALUE}'.encode() in request.content else False
+    )
+
+    _, uploaded = run_upload(path, reject_path=str(tmp_path / 'rejects.jsonl'))
+
+    assert uploaded == RECORD_COUNT
+    assert len(postgrest.rows('results')) == ALL_RESULTS - 1
+    rejects = read_rejects(tmp_path / 'rejects.jsonl')
+    assert [reject['row']['value'] for reject in rejects] == [REFUSED_VALUE]
+    assert rejects[0]['code'] == '23503'
+    assert read_journal(path)['records_done'] == RECORD_COUNT
+
+
+def test_retried_batch_skips_rows_applied_before_lost_response(run_upload, postgrest, records_file, tmp_path):
+    # The first results batch is written, but its response never arrives
+    postgrest.lose_response = lambda request, table: table == 'results' and results_posts(postgrest) == 1
+
+    uploader, uploaded = run_upload(records_file, retry_attempts=2, reject_path=str(tmp_path / 'rejects.jsonl'))
+
+    # The retry is an ignore-duplicates upsert, so the stored rows are not refused as duplicates
+    assert uploaded == RECORD_COUNT
+    assert uploader.retry.retries == 1
+    keys = postgrest.keys('results')
+    assert len(keys) == len(set(keys)) == ALL_RESULTS
+    assert read_rejects(tmp_path / 'rejects.jsonl') == []
+
+
+def test_force_push_retries_failed_batches_in_same_run(run_upload, postgrest, records_file):
+    # The first two results batches fail for good during the upload
+    postgrest.fail = lambda request, table: table == 'results' and results_posts(postgrest) <= 2
+
+    uploader, uploaded = run_upload(records_file, force_push=True)
+
+    assert uploaded == RECORD_COUNT
+    keys = postgrest.keys('results')
+    assert len(keys) == len(set(keys)) == ALL_RESULTS
+    assert len(postgrest.rows('experimental_runs')) == 1
+    assert {row['experimental_run_id'] for row in postgrest.rows('results')} == {uploader.experimental_run_id}
+    assert read_journal(records_file)['records_done'] == RECORD_COUNT
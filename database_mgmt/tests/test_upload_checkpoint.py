@@ -0,0 +1,99 @@
+"""Checkpoint journal and manifest across failed flushes, resumes and re-uploads."""
+
+import pytest
+
+from support import RECORD_COUNT, RESULTS_PER_RECORD, make_record, manifest_rows, read_journal, write_jsonl
+from utils.checkpoint import default_checkpoint_path
+
+
+def configuration_inserts_fail_after(postgrest, flushes: int):
+    """Drop every configuration insert after the first `flushes` (one insert per flush here)."""
+    def fail(request, table):
+        if table != 'configurations' or request.method != 'POST':
+            return False
+        return sum(1 for method, name in postgrest.requests if (method, name) == ('POST', 'configurations')) > flushes
+    postgrest.fail = fail
+
+
+def offset_after(path, lines: int) -> int:
+    with open(path, 'rb') as f:
+        return sum(len(f.readline()) for _ in range(lines))
+
+
+def test_upload_journals_whole_file(run_upload, postgrest, records_file, manifest_path, small_flushes):
+    _, uploaded = run_upload(records_file)
+
+    assert uploaded == RECORD_COUNT
+    assert len(postgrest.rows('results')) == RECORD_COUNT * RESULTS_PER_RECORD
+    assert read_journal(records_file)['records_done'] == RECORD_COUNT
+    assert read_journal(records_file)['offset'] == records_file.stat().st_size
+    assert manifest_rows(manifest_path) == RECORD_COUNT
+
+
+def test_failed_configuration_flush_holds_checkpoint_and_manifest(
+    run_upload, postgrest, records_file, manifest_path, small_flushes
+):
+    configuration_inserts_fail_after(postgrest, flushes=2)
+
+    _, uploaded = run_upload(records_file)
+
+    # Two flushes of 10 records went through, the other records count as failed
+    assert uploaded == 20
+    assert len(postgrest.rows('results')) == 20 * RESULTS_PER_RECORD
+    assert read_journal(records_file)['records_done'] == 20
+    assert read_journal(records_file)['offset'] == offset_after(records_file, 20)
+    assert manifest_rows(manifest_path) == 20
+
+
+def test_resume_after_failed_flush_uploads_each_record_once(
+    run_upload, postgrest, records_file, manifest_path, small_flushes
+):
+    configuration_inserts_fail_after(postgrest, flushes=2)
+    run_upload(records_file)
+    postgrest.fail = None
+
+    _, uploaded = run_upload(records_file, resume_from_checkpoint=True)
+
+    assert uploaded == RECORD_COUNT - 20
+    keys = postgrest.keys('results')
+    assert len(keys) == len(set(keys)) == RECORD_COUNT * RESULTS_PER_RECORD
+    assert read_journal(records_file)['records_done'] == RECORD_COUNT
+    assert manifest_rows(manifest_path) == RECORD_COUNT
+
+
+def test_failure_in_first_flush_writes_no_journal(run_upload, postgrest, records_file, manifest_path, small_flushes):
+    configuration_inserts_fail_after(postgrest, flushes=0)
+
+    _, uploaded = run_upload(records_file)
+
+    assert uploaded == 0
+    assert not default_checkpoint_path(str(records_file)).exists()
+    assert manifest_rows(manifest_path) == 0
+    with pytest.raises(ValueError, match='No checkpoint journal'):
+        run_upload(records_file, resume_from_checkpoint=True)
+
+
+def test_resume_refuses_rewritten_file(run_upload, postgrest, records_file, small_flushes):
+    configuration_inserts_fail_after(postgrest, flushes=2)
+    run_upload(records_file)
+    postgrest.fail = None
+    # Dropping a line shifts every record after it against the journaled offset
+    lines = records_file.read_bytes().splitlines(keepends=True)
+    records_file.write_bytes(b''.join(lines[1:]))
+
+    with pytest.raises(ValueError, match='no longer matches the checkpoint'):
+        run_upload(records_file, resume_from_checkpoint=True)
+
+
+def test_manifest_skips_unchanged_records(run_upload, postgrest, records_file, capsys):
+    run_upload(records_file)
+    changed = make_record(0)
+    changed['overall_score'] = -1.0
+    write_jsonl(records_file, [changed, make_record(RECORD_COUNT)], mode='a')
+    capsys.readouterr()
+
+    _, uploaded = run_upload(records_file)
+
+    # Only the changed copy of record 0 and the new record are uploaded again
+    assert uploaded == 2
+    assert f'Manifest: {RECORD_COUNT} unchanged (skipped), 1 new, 1 changed' in capsys.readouterr().out
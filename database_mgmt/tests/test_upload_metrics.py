@@ -0,0 +1,55 @@
+"""The metrics report: requests counted by the httpx event hooks, as JSON and in Prometheus format."""
+
+import json
+import re
+from collections import Counter
+
+from fake_postgrest import error_response
+
+# A sample line of the Prometheus text exposition format
+PROMETHEUS_SAMPLE = re.compile(r'^[a-z_]+\{([a-z_]+="[^"]*",?)*\} [0-9.e+-]+$')
+
+
+def test_report_counts_requests_per_table(run_upload, postgrest, records_file, tmp_path, no_backoff):
+    # One results request is answered with an error, then retried
+    postgrest.fail = lambda request, table: (
+        error_response(503, 'PGRST001', 'database unavailable')
+        if (request.method, table) == ('POST', 'results') and postgrest.requests.count(('POST', 'results')) == 1
+        else False
+    )
+    metrics_path = tmp_path / 'metrics.json'
+    prometheus_path = tmp_path / 'metrics.prom'
+
+    run_upload(
+        records_file, retry_attempts=2, metrics_path=str(metrics_path), metrics_prometheus_path=str(prometheus_path)
+    )
+
+    report = json.loads(metrics_path.read_text())
+    served = Counter(table for _method, table in postgrest.requests)
+    counted = {table: sum(stats['count'] for stats in operations.values())
+               for table, operations in report['requests'].items()}
+    assert counted == dict(served)
+    assert report['totals']['requests'] == len(postgrest.requests)
+    assert report['totals']['errors'] == 1
+    results = report['requests']['results']['upsert']
+    assert results['count'] == postgrest.requests.count(('POST', 'results'))
+    assert results['errors'] == 1
+    assert results['latency_seconds']['buckets']['+Inf'] == results['count']
+
+    prometheus = prometheus_path.read_text()
+    lines = prometheus.splitlines()
+    for line in lines:
+        assert line.startswith('# HELP ') or line.startswith('# TYPE ') or PROMETHEUS_SAMPLE.match(line), line
+    assert '# TYPE skylight_upload_requests_total counter' in lines
+    assert '# TYPE skylight_upload_request_duration_seconds histogram' in lines
+    for table, count in served.items():
+        samples = [
+            line for line in lines
+            if line.startswith(f'skylight_upload_requests_total{{table="{table}",')
+        ]
+        assert sum(int(line.rsplit(' ', 1)[1]) for line in samples) == count, table
+    assert 'skylight_upload_request_errors_total{table="results",operation="upsert"} 1' in lines
+    assert (
+        f'skylight_upload_request_duration_seconds_bucket{{table="results",operation="upsert",le="+Inf"}} '
+        f'{results["count"]}'
+    ) in lines
@@ -0,0 +1 @@
+"""Shared helpers for the database management scripts."""
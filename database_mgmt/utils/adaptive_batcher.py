@@ -0,0 +1,111 @@
+"""
+Adaptive sizing for result batches.
+
+Fixed tiny batches waste round trips on fast links, while large batches run
+into request-size limits and timeouts on slow ones. AdaptiveBatchSizer picks
+the number of rows per request from feedback on each completed batch:
+
+- fast successful batches grow the size multiplicatively,
+- batches slower than the target latency shrink it,
+- failed batches halve it,
+
+always within the configured row and payload-byte caps.
+"""
+
+import threading
+from typing import List, Optional
+
+# Growth and shrink factors for the size controller
+GROWTH_FACTOR = 1.5
+SHRINK_FACTOR = 0.7
+ERROR_FACTOR = 0.5
+
+# Weight of the newest observation in the bytes-per-row average
+ROW_BYTES_SMOOTHING = 0.2
+
+
+class AdaptiveBatchSizer:
+    """Chooses rows per batch from observed latency, payload size and errors."""
+
+    def __init__(
+        self,
+        initial_rows: int = 20,
+        min_rows: int = 1,
+        max_rows: int = 500,
+        max_bytes: int = 1_000_000,
+        target_latency: float = 1.0,
+        adaptive: bool = True
+    ):
+        """
+        Args:
+            initial_rows: Rows in the first batch
+            min_rows: Smallest batch the sizer will shrink to
+            max_rows: Row cap per batch
+            max_bytes: Payload byte cap per batch
+            target_latency: Batches slower than this (seconds) shrink the size
+            adaptive: If False, always use initial_rows
+        """
+        if not 1 <= min_rows <= max_rows:
+            raise ValueError("batch sizes must satisfy 1 <= min_rows <= max_rows")
+
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.adaptive = adaptive
+
+        self._lock = threading.Lock()
+        self._rows = float(min(max(initial_rows, min_rows), max_rows))
+        self._row_bytes: Optional[float] = None
+        self.history: List[int] = []
+
+    @property
+    def current_rows(self) -> int:
+        """Rows the next batch will hold, after applying the byte cap."""
+        with self._lock:
+            return self._capped_rows()
+
+    def _capped_rows(self) -> int:
+        rows = int(self._rows)
+        if self._row_bytes:
+            rows = min(rows, int(self.max_bytes // self._row_bytes))
+        return max(rows, self.min_rows)
+
+    def record(self, rows: int, payload_bytes: int, latency: float, failed: bool = False):
+        """Feed back the outcome of one batch."""
+        with self._lock:
+            if rows > 0 and payload_bytes > 0:
+                row_bytes = payload_bytes / rows
+                if self._row_bytes is None:
+                    self._row_bytes = row_bytes
+                else:
+                    self._row_bytes += ROW_BYTES_SMOOTHING * (row_bytes - self._row_bytes)
+
+            if not self.adaptive:
+                return
+
+            if failed:
+                self._rows *= ERROR_FACTOR
+            elif latency > self.target_latency:
+                self._rows *= SHRINK_FACTOR
+            elif rows >= self._capped_rows():
+                # Only grow when the batch actually used the current size
+                self._rows *= GROWTH_FACTOR
+            self._rows = min(max(self._rows, self.min_rows), self.max_rows)
+            self.history.append(self._capped_rows())
+
+    @property
+    def converged_rows(self) -> int:
+        """Typical batch size over the most recent batches."""
+        with self._lock:
+            recent = sorted(self.history[-20:])
+        if not recent:
+            return self.current_rows
+        return recent[len(recent) // 2]
+
+    def describe(self) -> str:
+        """Human-readable summary of the size the sizer settled on."""
+        rows = self.converged_rows
+        if self._row_bytes:
+            return f"{rows} rows/batch (~{rows * self._row_bytes / 1024:.0f} KB)"
+        return f"{rows} rows/batch"
@@ -0,0 +1,77 @@
+"""
+Asyncio plumbing for the async upload engine (upload.py --engine async).
+
+The upload pipeline itself stays synchronous: records are parsed and
+processed by the main thread (or file workers), which is CPU-bound work.
+Every request is a coroutine run on one event loop in a background thread,
+so any number of them can be in flight without a thread each:
+
+- EventLoopThread runs the loop and lets synchronous code submit
+  coroutines to it and wait for them,
+- SingleFlight makes concurrent callers asking for the same key (e.g. two
+  records missing the same entity in the id cache) share one request
+  instead of racing to insert the same row.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class EventLoopThread:
+    """An asyncio event loop running in a daemon thread."""
+
+    def __init__(self, name: str = 'asyncio-engine'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine: Awaitable[T]) -> 'Future[T]':
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Awaitable[T]) -> T:
+        """Run a coroutine on the loop and wait for its result (not callable from the loop)."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("EventLoopThread.run() called from its own loop; await the coroutine instead")
+        return self.submit(coroutine).result()
+
+    def close(self):
+        """Stop the loop once the callbacks already scheduled have run, and join the thread."""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key: while a call for a key is running,
+    further callers with that key wait for its result instead of starting
+    their own. Only used from the event loop's thread.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Await call(), or the call already running for `key`."""
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _done: self._in_flight.pop(key, None))
+        else:
+            self.shared += 1
+        # A cancelled caller must not cancel the call the others are waiting on
+        return await asyncio.shield(future)
+
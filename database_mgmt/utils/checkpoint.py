@@ -0,0 +1,221 @@
+"""
+Checkpoint journal for resumable uploads.
+
+After each results flush, upload.py notes the byte offset just past the last
+record read, together with the number of the last result batch that flush
+queued. Once the writer reports every batch up to that number as committed,
+the offset is written to a small JSON journal. `upload.py --resume` reads
+the journal, checks that the input file still matches and seeks straight to
+the offset instead of re-parsing every record before it.
+
+The input is identified by the hash of the last record line before the
+offset. The reader already holds that line when a flush is marked, so
+journaling never reads the input again; only --resume reads back to check it.
+"""
+
+import os
+import json
+import hashlib
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from utils.jsonl_reader import open_jsonl
+from utils.manifest import line_hash
+
+CHECKPOINT_VERSION = 2
+
+# Bytes before the checkpoint offset hashed by version 1 journals, and the
+# first read size when looking for the last line before an offset
+TAIL_DIGEST_BYTES = 4096
+
+
+def default_checkpoint_path(jsonl_filepath: str) -> Path:
+    """Journal path used when --checkpoint is not given: next to the input file."""
+    return Path(f"{jsonl_filepath}.checkpoint.json")
+
+
+def _read_before(filepath: str, offset: int, size: int) -> Optional[bytes]:
+    """
+    The `size` bytes just before `offset` (fewer at the start of the file).
+
+    Offsets and bytes are those of the decompressed stream for compressed
+    files. Returns None if the file ends before `offset`.
+    """
+    start = max(offset - size, 0)
+    tail = b''
+    with open_jsonl(filepath, start) as f:
+        # Decompressing readers may return short reads
+        while len(tail) < offset - start:
+            chunk = f.read(offset - start - len(tail))
+            if not chunk:
+                break
+            tail += chunk
+    if len(tail) < offset - start:
+        return None
+    return tail
+
+
+def tail_digest(filepath: str, offset: int) -> Optional[str]:
+    """SHA-256 of the bytes just before `offset`, as stored by version 1 journals."""
+    tail = _read_before(filepath, offset, TAIL_DIGEST_BYTES)
+    return None if tail is None else hashlib.sha256(tail).hexdigest()
+
+
+def last_line_hash(filepath: str, offset: int) -> Optional[str]:
+    """
+    line_hash of the last non-blank line ending at or before `offset`.
+
+    Used on resume to check the file against the journal; reads backwards
+    in growing steps so long lines are found too. Returns None at offset 0,
+    or if the file ends before `offset`.
+    """
+    size = TAIL_DIGEST_BYTES
+    while offset > 0:
+        tail = _read_before(filepath, offset, size)
+        if tail is None:
+            return None
+        lines = tail.rstrip().rsplit(b'\n', 1)
+        # Without a newline the line may begin before the bytes read
+        if len(lines) == 2 or size >= offset:
+            return line_hash(lines[-1].strip()) if lines[-1].strip() else None
+        size *= 4
+    return None
+
+
+def tail_hash(tail: Union[bytes, str, None]) -> Optional[str]:
+    """Hash for mark(): readers hand over the last record line itself or its line_hash."""
+    return line_hash(tail) if isinstance(tail, bytes) else tail
+
+
+class CheckpointJournal:
+    """Tracks the committed byte offset of one upload and persists it atomically."""
+
+    def __init__(self, path: Path, jsonl_filepath: str):
+        """
+        Args:
+            path: JSON journal file
+            jsonl_filepath: Input file the offsets refer to
+        """
+        self.path = Path(path)
+        self.jsonl_filepath = jsonl_filepath
+        self.state: Dict[str, Any] = {}
+        # (offset, last batch number, records done, tail hash) waiting for their batches to commit
+        self._marks: Deque[Tuple[int, int, int, Optional[str]]] = deque()
+        self._disabled = False
+
+    def load(
+        self,
+        models: Optional[List[str]] = None,
+        baselines: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Read and validate the journal for resuming.
+
+        Raises:
+            ValueError: If there is no usable journal, or the input file or
+                filters differ from the run that wrote it
+        """
+        if not self.path.exists():
+            raise ValueError(f"No checkpoint journal at {self.path}; run without --resume first")
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        if state.get('version') not in (1, CHECKPOINT_VERSION):
+            raise ValueError(f"Unsupported checkpoint journal version in {self.path}")
+        if state['models'] != models or state['baselines'] != baselines:
+            raise ValueError(
+                f"Checkpoint was written with --models {state['models']} --baselines {state['baselines']}; "
+                "resume with the same filters"
+            )
+        offset = state['offset']
+        if state['version'] == 1:
+            matches = tail_digest(self.jsonl_filepath, offset) == state['tail_sha256']
+        else:
+            matches = last_line_hash(self.jsonl_filepath, offset) == state['tail_line_hash']
+        if not matches:
+            raise ValueError(
+                f"{self.jsonl_filepath} no longer matches the checkpoint in {self.path} "
+                "(the file was rewritten, not appended to)"
+            )
+
+        # Journaled from here on in the current format
+        state['version'] = CHECKPOINT_VERSION
+        state['tail_line_hash'] = last_line_hash(self.jsonl_filepath, offset)
+        state.pop('tail_sha256', None)
+        self.state = state
+        return state
+
+    def start(
+        self,
+        experimental_run_id: str,
+        experimental_run_name: Optional[str],
+        models: Optional[List[str]] = None,
+        baselines: Optional[List[str]] = None
+    ):
+        """Begin a fresh journal for a new upload (nothing is written until the first commit)."""
+        self.state = {
+            'version': CHECKPOINT_VERSION,
+            'file': str(Path(self.jsonl_filepath).resolve()),
+            'experimental_run_id': experimental_run_id,
+            'experimental_run_name': experimental_run_name,
+            'models': models,
+            'baselines': baselines,
+            'offset': 0,
+            'records_done': 0,
+            'last_batch': 0,
+            'tail_line_hash': None,
+        }
+
+    def mark(self, offset: int, last_batch: int, records_done: int, tail: Union[bytes, str, None] = None):
+        """
+        Note that everything before `offset` is covered once batch `last_batch` commits.
+
+        Args:
+            tail: The last record line before `offset` (stripped), or its
+                line_hash; None only at the start of the file
+        """
+        self._marks.append((offset, last_batch, records_done, tail_hash(tail)))
+
+    def advance(self, committed_through: int) -> bool:
+        """
+        Persist the newest mark whose batches have all committed.
+
+        Args:
+            committed_through: Highest batch number with every batch up to it written
+
+        Returns:
+            True if the journal was updated
+        """
+        latest = None
+        while self._marks and self._marks[0][1] <= committed_through:
+            latest = self._marks.popleft()
+        if latest is None:
+            return False
+
+        offset, last_batch, records_done, tail = latest
+        self.state.update({
+            'offset': offset,
+            'records_done': records_done,
+            'last_batch': last_batch,
+            'tail_line_hash': tail,
+            'updated_at': datetime.now().isoformat(),
+        })
+        self._write()
+        return True
+
+    def _write(self):
+        """Replace the journal atomically so a crash never leaves it half-written."""
+        if self._disabled:
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not write checkpoint journal {self.path}: {e}; continuing without it")
+            self._disabled = True
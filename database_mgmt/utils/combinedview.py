@@ -37,11 +37,16 @@ import os
 import sys
 import argparse
 import json
+from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from collections import defaultdict
 
+# Make the utils package importable when run as a script from this directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 try:
-    from supabase import create_client, Client
+    from supabase import Client
+    from utils.http_client import create_supabase_client
 except ImportError:
     print("Error: supabase-py not installed. Run: pip install supabase")
     sys.exit(1)
@@ -52,7 +57,7 @@ class CombinedViewGenerator:
 
     def __init__(self, supabase_url: str, supabase_key: str):
         """Initialize Supabase client."""
-        self.supabase: Client = create_client(supabase_url, supabase_key)
+        self.supabase: Client = create_supabase_client(supabase_url, supabase_key)
 
     def get_all_llms(self) -> List[Tuple[str, str]]:
         """Get all LLMs from database. Returns list of (id, name) tuples."""
@@ -0,0 +1,112 @@
+"""
+Content-addressed storage of configuration `additional_params`.
+
+A sweep typically creates thousands of configurations that share a handful
+of distinct config blobs (the same hyperparameters under every dataset and
+model). With --config-blobs each distinct blob is stored once in
+`config_blobs`, keyed by the SHA-256 of its canonical JSON, and
+configurations reference it through `params_hash` instead of carrying a
+copy in `additional_params`. Readers look the params up in a separate,
+chunked query on `config_blobs` by `params_hash` and fall back to them when
+`additional_params` is NULL, as the backend's configuration repository does
+(see DB_Schema.md and README.md).
+
+The canonical form sorts object keys and drops insignificant whitespace,
+so blobs that differ only in key order or formatting share one row. Finding
+it means decoding the blob, which the uploader otherwise avoids (see
+utils/raw_json.py). So the hash is remembered per digest of the raw text:
+each distinct blob text is decoded once, however many configurations
+carry it.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from utils.raw_json import RawJson, decode_raw
+
+
+def canonical_json(value: Any) -> bytes:
+    """Encode a JSON value with sorted keys and no insignificant whitespace."""
+    return json.dumps(
+        value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str
+    ).encode()
+
+
+def config_hash(canonical: bytes) -> str:
+    """Content address of a canonical config blob."""
+    return hashlib.sha256(canonical).hexdigest()
+
+
+class ConfigBlobStore:
+    """
+    Distinct config blobs of an upload, waiting to be written or already written.
+
+    stage() is called for every configuration that is about to be inserted;
+    take() hands the blobs not yet written to the next flush, which writes
+    them before the configurations that reference them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._staged: Dict[str, RawJson] = {}
+        self._written: Set[str] = set()
+        # Digest of a blob's raw text -> (hash, canonical length), so repeats are not decoded
+        self._raw_hashes: Dict[bytes, Tuple[str, int]] = {}
+        # Configurations that referenced a blob already staged or written,
+        # and the blob bytes they did not have to send
+        self.shared = 0
+        self.bytes_saved = 0
+
+    def stage(self, config: Any) -> Optional[str]:
+        """
+        Stage a config blob and return its hash (None for a missing config).
+
+        Args:
+            config: Decoded config, or RawJson as read from the record
+        """
+        raw_digest = hashlib.blake2b(config.raw, digest_size=16).digest() if isinstance(config, RawJson) else None
+        with self._lock:
+            known = self._raw_hashes.get(raw_digest) if raw_digest else None
+        if known is not None:
+            params_hash, canonical_length = known
+            canonical = None
+        else:
+            value = decode_raw(config)
+            if value is None:
+                return None
+            canonical = canonical_json(value)
+            params_hash, canonical_length = config_hash(canonical), len(canonical)
+
+        with self._lock:
+            if raw_digest:
+                self._raw_hashes[raw_digest] = (params_hash, canonical_length)
+            if params_hash in self._staged or params_hash in self._written:
+                self.shared += 1
+                self.bytes_saved += canonical_length
+            elif canonical is not None:
+                self._staged[params_hash] = RawJson(canonical)
+            else:
+                # Taken but not written (a failed flush): rebuild it from this copy
+                self._staged[params_hash] = RawJson(canonical_json(decode_raw(config)))
+        return params_hash
+
+    def take(self) -> Dict[str, RawJson]:
+        """Remove and return the blobs staged since the last call."""
+        with self._lock:
+            staged, self._staged = self._staged, {}
+        return staged
+
+    def mark_written(self, hashes: Iterable[str]):
+        """
+        Record blobs as stored; blobs taken but never marked are staged
+        again by the next configuration that references them.
+        """
+        with self._lock:
+            self._written.update(hashes)
+
+    @property
+    def written(self) -> int:
+        """Number of distinct blobs stored (or found stored) during this upload."""
+        return len(self._written)
@@ -0,0 +1,33 @@
+"""
+Deterministic primary keys for uploaded entities.
+
+Each row id is a UUIDv5 derived from the table name and the row's natural
+key (benchmark name, (benchmark_id, dataset name), configuration tuple, ...).
+Because every uploader derives the same id for the same entity, rows can be
+written blindly with `ON CONFLICT (id) DO NOTHING` and no lookups, and
+parallel uploaders cannot race each other into duplicates.
+
+Ids only line up with rows that were written in this mode: an existing row
+created with a random `gen_random_uuid()` id will conflict on its natural key.
+"""
+
+import json
+import uuid
+from typing import Any
+
+# Fixed namespace for all Sky Light entity ids; changing it changes every id
+SKYLIGHT_NAMESPACE = uuid.UUID('6f1d3c8e-2b7a-5e41-9c0d-4a8b2f6e1d37')
+
+
+def entity_uuid(table: str, natural_key: Any) -> str:
+    """
+    Derive the id of a row from its table and natural key.
+
+    Args:
+        table: Table name, so equal keys in different tables get different ids
+        natural_key: Name, or tuple of parent ids and values identifying the row
+    """
+    if not isinstance(natural_key, (list, tuple)):
+        natural_key = (natural_key,)
+    canonical = json.dumps([table, *natural_key], separators=(',', ':'))
+    return str(uuid.uuid5(SKYLIGHT_NAMESPACE, canonical))
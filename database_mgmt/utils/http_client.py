@@ -0,0 +1,137 @@
+"""
+Shared, pooled HTTP client for the Supabase scripts.
+
+Every script talks to PostgREST with thousands of small requests. Instead of
+leaving connection handling to each library's defaults, all Supabase clients
+created here share one httpx.Client per process with:
+
+- keep-alive pooling sized for the script's concurrency, with idle
+  connections kept long enough to survive the gaps between flushes,
+- HTTP/2 when the `h2` package is installed (pip install 'httpx[http2]'),
+  so concurrent requests are multiplexed over one TLS connection,
+- explicit connect/read/write/pool timeouts, so a stalled request fails
+  (and can be retried) instead of hanging the upload.
+
+The asyncio engine of upload.py gets an httpx.AsyncClient with the same
+settings; it belongs to that engine's event loop and is not shared.
+"""
+
+import threading
+from typing import Optional
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, acreate_client, create_client
+
+# Connections kept per host; at least the number of concurrent requests
+DEFAULT_POOL_SIZE = 16
+
+# Seconds an idle keep-alive connection is kept open
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+# Seconds to establish a connection, and to wait for a request's response
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_REQUEST_TIMEOUT = 60.0
+
+_shared_client: Optional[httpx.Client] = None
+_shared_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """Whether httpx can speak HTTP/2 (needs the h2 package)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    http2: Optional[bool] = None
+) -> httpx.Client:
+    """
+    Create a pooled httpx client.
+
+    Args:
+        pool_size: Maximum connections, all of which may be kept alive
+        keepalive_expiry: Seconds an idle connection is kept open
+        timeout: Seconds to wait for a response (read/write), and for a free pooled connection
+        connect_timeout: Seconds to establish a connection
+        http2: Use HTTP/2 (None = when the h2 package is installed)
+    """
+    return httpx.Client(**_client_settings(pool_size, keepalive_expiry, timeout, connect_timeout, http2))
+
+
+def create_async_http_client(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    http2: Optional[bool] = None
+) -> httpx.AsyncClient:
+    """Create a pooled httpx.AsyncClient (arguments as for create_http_client)."""
+    return httpx.AsyncClient(**_client_settings(pool_size, keepalive_expiry, timeout, connect_timeout, http2))
+
+
+def _client_settings(
+    pool_size: int,
+    keepalive_expiry: float,
+    timeout: float,
+    connect_timeout: float,
+    http2: Optional[bool]
+) -> dict:
+    return {
+        'http2': http2_available() if http2 is None else http2,
+        'limits': httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=keepalive_expiry
+        ),
+        'timeout': httpx.Timeout(timeout, connect=connect_timeout),
+        'follow_redirects': True,
+    }
+
+
+def shared_http_client(**pool_options) -> httpx.Client:
+    """
+    Return the process-wide pooled client, creating it on first use.
+
+    Options (see create_http_client) only apply to the call that creates it.
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None or _shared_client.is_closed:
+            _shared_client = create_http_client(**pool_options)
+        return _shared_client
+
+
+def create_supabase_client(
+    supabase_url: str,
+    supabase_key: str,
+    http_client: Optional[httpx.Client] = None,
+    **pool_options
+) -> Client:
+    """
+    Create a Supabase client whose requests go through a pooled HTTP client.
+
+    Args:
+        supabase_url: Project URL
+        supabase_key: API key
+        http_client: Client to use (None = the shared pooled client)
+        **pool_options: Settings for the shared client (see create_http_client)
+    """
+    options = ClientOptions(httpx_client=http_client or shared_http_client(**pool_options))
+    return create_client(supabase_url, supabase_key, options=options)
+
+
+async def create_async_supabase_client(
+    supabase_url: str,
+    supabase_key: str,
+    http_client: httpx.AsyncClient
+) -> AsyncClient:
+    """Create an async Supabase client whose requests go through `http_client`."""
+    options = AsyncClientOptions(httpx_client=http_client)
+    return await acreate_client(supabase_url, supabase_key, options=options)
@@ -0,0 +1,100 @@
+"""
+Persistent on-disk cache of entity ids shared across upload runs.
+
+Ids are stored in a local SQLite file, keyed by table and natural key and
+scoped per Supabase URL, together with the table's row count at the time
+they were saved. A later run probes the server's row count for each table
+and reuses the stored ids when it matches, so repeated incremental uploads
+from the same machine skip the paged prefetch entirely.
+
+A count probe cannot see a delete followed by an equal number of inserts;
+`--purge` clears the cache explicitly for that reason.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_ID_CACHE_PATH = Path.home() / '.cache' / 'skylight' / 'id_cache.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entity_ids (
+    scope TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    natural_key TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (scope, tbl, natural_key)
+);
+CREATE TABLE IF NOT EXISTS table_state (
+    scope TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (scope, tbl)
+);
+"""
+
+
+def _encode_key(key: Any) -> str:
+    return json.dumps(list(key) if isinstance(key, tuple) else key, separators=(',', ':'))
+
+
+def _decode_key(encoded: str) -> Any:
+    key = json.loads(encoded)
+    return tuple(key) if isinstance(key, list) else key
+
+
+class PersistentIdCache:
+    """SQLite-backed id cache for one Supabase project."""
+
+    def __init__(self, path: Path, scope: str):
+        """
+        Args:
+            path: SQLite file to use (created if missing)
+            scope: Identifies the database the ids belong to (the Supabase URL)
+        """
+        self.path = Path(path)
+        self.scope = scope
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(_SCHEMA)
+
+    def stored_count(self, table: str) -> Optional[int]:
+        """Row count of `table` when its ids were saved, or None if nothing is stored."""
+        row = self._conn.execute(
+            'SELECT row_count FROM table_state WHERE scope = ? AND tbl = ?',
+            (self.scope, table)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load(self, table: str) -> Dict[Any, str]:
+        """Return the stored {natural key: id} entries for `table`."""
+        rows = self._conn.execute(
+            'SELECT natural_key, id FROM entity_ids WHERE scope = ? AND tbl = ?',
+            (self.scope, table)
+        )
+        return {_decode_key(natural_key): entity_id for natural_key, entity_id in rows}
+
+    def save(self, table: str, entries: Dict[Any, str], row_count: int):
+        """Replace the stored ids for `table`, recording the server row count they match."""
+        with self._conn:
+            self._conn.execute(
+                'DELETE FROM entity_ids WHERE scope = ? AND tbl = ?', (self.scope, table)
+            )
+            self._conn.executemany(
+                'INSERT INTO entity_ids (scope, tbl, natural_key, id) VALUES (?, ?, ?, ?)',
+                ((self.scope, table, _encode_key(key), entity_id) for key, entity_id in entries.items())
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO table_state (scope, tbl, row_count) VALUES (?, ?, ?)',
+                (self.scope, table, row_count)
+            )
+
+    def clear(self):
+        """Forget every stored id for this scope."""
+        with self._conn:
+            self._conn.execute('DELETE FROM entity_ids WHERE scope = ?', (self.scope,))
+            self._conn.execute('DELETE FROM table_state WHERE scope = ?', (self.scope,))
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,186 @@
+"""
+Streaming readers for experiment JSONL files.
+
+Records are yielded one at a time so callers can walk arbitrarily large
+files in bounded memory instead of materialising them as a list.
+
+gzip and zstd compressed files are decompressed on the fly, detected by
+extension or magic bytes. Byte offsets always refer to the decompressed
+stream. zstd support needs the zstandard package (pip install zstandard).
+"""
+
+import glob
+import gzip
+import json
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Characters that make an input path a glob pattern
+GLOB_CHARS = '*?['
+
+# Files picked up from a directory given as input
+JSONL_PATTERNS = ('*.jsonl', '*.jsonl.gz', '*.jsonl.zst')
+
+# Leading bytes and extensions of the supported compression formats
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.gzip': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+
+# Bytes decompressed per read when skipping to an offset
+_SKIP_CHUNK_BYTES = 1024 * 1024
+
+
+def detect_compression(filepath: str) -> Optional[str]:
+    """
+    Return 'gzip', 'zstd' or None for a plain file.
+
+    The extension decides when it names a format; otherwise the first bytes
+    of the file are checked, so renamed archives are still recognised.
+    """
+    compression = COMPRESSION_SUFFIXES.get(Path(filepath).suffix.lower())
+    if compression:
+        return compression
+    with open(filepath, 'rb') as f:
+        magic = f.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if magic == ZSTD_MAGIC:
+        return 'zstd'
+    return None
+
+
+def open_jsonl(filepath: str, start: int = 0) -> BinaryIO:
+    """
+    Open a JSONL file for binary line reading, decompressing it if needed.
+
+    Args:
+        filepath: Path to a plain, gzip or zstd JSONL file
+        start: Offset in the decompressed stream to position the file at
+            (compressed files are decompressed up to it, not seeked)
+
+    Raises:
+        ImportError: For a zstd file when zstandard is not installed
+    """
+    compression = detect_compression(filepath)
+    if compression is None:
+        f = open(filepath, 'rb')
+        f.seek(start)
+        return f
+
+    if compression == 'gzip':
+        f = gzip.open(filepath, 'rb')
+    else:
+        if zstandard is None:
+            raise ImportError(f"{filepath} is zstd compressed; install zstandard to read it (pip install zstandard)")
+        # read_across_frames handles files written by several zstd runs or pzstd
+        f = zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True, read_across_frames=True)
+    remaining = start
+    while remaining > 0:
+        chunk = f.read(min(remaining, _SKIP_CHUNK_BYTES))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+    return f
+
+
+def iter_lines(f: BinaryIO) -> Iterator[bytes]:
+    """Yield the lines of a file from open_jsonl, keeping their newlines."""
+    if zstandard is None or not isinstance(f, zstandard.ZstdDecompressionReader):
+        yield from f
+        return
+    # zstd readers do not implement readline; split decompressed chunks instead
+    pending = b''
+    while True:
+        chunk = f.read(_SKIP_CHUNK_BYTES)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + b'\n'
+    if pending:
+        yield pending
+
+
+def iter_jsonl(filepath: str, warn: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Yield records from a JSONL file, skipping blank and malformed lines.
+
+    Args:
+        filepath: Path to the JSONL file
+        warn: Print a warning for each malformed line (disable on re-reads
+            so the same warning is not shown twice)
+    """
+    for _, record in iter_jsonl_with_offsets(filepath, warn=warn):
+        yield record
+
+
+def iter_jsonl_with_offsets(
+    filepath: str,
+    start: int = 0,
+    warn: bool = True,
+    skip_line: Optional[Callable[[bytes], bool]] = None,
+    with_lines: bool = False
+) -> Iterator[Tuple]:
+    """
+    Yield (end offset, record) pairs, starting at a byte offset.
+
+    The end offset is the position just past the record's line, so seeking
+    there later continues with the next record.
+
+    Args:
+        filepath: Path to the JSONL file
+        start: Byte offset to start reading from (must be at a line start)
+        warn: Print a warning for each malformed line
+        skip_line: Called with each stripped line before it is parsed; lines
+            for which it returns True are not parsed or yielded
+        with_lines: Yield (end offset, stripped line, record) triples instead
+    """
+    with open_jsonl(filepath, start) as f:
+        offset = start
+        for line_num, line in enumerate(iter_lines(f), 1):
+            offset += len(line)
+            line = line.strip()
+            if not line or (skip_line is not None and skip_line(line)):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                if warn:
+                    where = f"line {line_num}" if start == 0 else f"line {line_num} after byte {start}"
+                    print(f"Warning: Skipping {where} due to JSON error: {e}")
+                continue
+            yield (offset, line, record) if with_lines else (offset, record)
+
+
+def expand_input_paths(specs: Iterable[str]) -> List[str]:
+    """
+    Expand input arguments into a list of JSONL files.
+
+    A directory stands for the `*.jsonl` files directly inside it (also
+    gzip and zstd compressed, `*.jsonl.gz` and `*.jsonl.zst`), and an
+    argument containing glob characters is expanded (`**` matches
+    subdirectories). Files listed more than once are kept only once, in the
+    order first seen.
+
+    Raises:
+        FileNotFoundError: If an argument names no existing file
+    """
+    paths = []
+    for spec in specs:
+        if any(char in spec for char in GLOB_CHARS):
+            matches = sorted(glob.glob(spec, recursive=True))
+        elif Path(spec).is_dir():
+            matches = sorted(str(path) for pattern in JSONL_PATTERNS for path in Path(spec).glob(pattern))
+        else:
+            matches = [spec] if Path(spec).exists() else []
+        matches = [match for match in matches if Path(match).is_file()]
+        if not matches:
+            raise FileNotFoundError(f"No JSONL files found for {spec}")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
@@ -0,0 +1,221 @@
+"""
+Single-pass statistics over experiment records, for --dry-run.
+
+JsonlStats is fed one record at a time and keeps only counters, value ranges
+and a handful of sample records, so analysing a file costs one streaming
+read and memory bounded by the number of distinct entities, not by the
+number of records. The result prints as the dry-run report or serializes
+to JSON.
+"""
+
+import json
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from utils.result_values import check_result_value
+from utils.result_rows import METRIC_FIELDS
+
+# Fields every uploadable record needs (empty values count as missing)
+REQUIRED_FIELDS = ('model_name', 'baseline', 'benchmark', 'dataset', 'benchmark_metrics')
+
+# Per-record numeric fields whose ranges are reported
+NUMERIC_FIELDS = ('density_target', *(metric_field.source for metric_field in METRIC_FIELDS))
+
+# Records kept for the sample section of the report
+SAMPLE_RECORDS = 5
+
+
+class ValueRange:
+    """Count, minimum, maximum and mean of a stream of numbers."""
+
+    __slots__ = ('count', 'minimum', 'maximum', 'total', 'non_finite')
+
+    def __init__(self):
+        self.count = 0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.total = 0.0
+        self.non_finite = 0
+
+    def add(self, value: Any):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        if isinstance(value, float) and not math.isfinite(value):
+            self.non_finite += 1
+            return
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'min': self.minimum,
+            'max': self.maximum,
+            'mean': self.mean,
+            'non_finite': self.non_finite,
+        }
+
+    def describe(self) -> str:
+        if not self.count:
+            return 'no numeric values'
+        text = f"{self.count} values, min {self.minimum:g}, max {self.maximum:g}, mean {self.mean:g}"
+        if self.non_finite:
+            text += f", {self.non_finite} NaN/infinite"
+        return text
+
+
+class JsonlStats:
+    """Accumulates dry-run statistics over records in one pass."""
+
+    def __init__(self):
+        self.records = 0
+        self.records_per_file: Counter = Counter()
+        self.baselines: Counter = Counter()
+        self.models: Counter = Counter()
+        self.benchmarks: Counter = Counter()
+        self.datasets: Counter = Counter()
+        self.metrics: Counter = Counter()
+        self.missing_fields: Counter = Counter()
+        self.ranges: Dict[str, ValueRange] = {}
+        # Result values the results.value column would refuse, per metric
+        self.unstorable: Counter = Counter()
+        self.samples: List[Dict[str, Any]] = []
+
+    def _range(self, name: str) -> ValueRange:
+        value_range = self.ranges.get(name)
+        if value_range is None:
+            value_range = self.ranges[name] = ValueRange()
+        return value_range
+
+    def add(self, record: Dict[str, Any], source: Optional[str] = None):
+        """Fold one record into the statistics."""
+        self.records += 1
+        if source is not None:
+            self.records_per_file[source] += 1
+
+        for field in REQUIRED_FIELDS:
+            if not record.get(field):
+                self.missing_fields[field] += 1
+        for counter, field in (
+            (self.baselines, 'baseline'),
+            (self.models, 'model_name'),
+            (self.benchmarks, 'benchmark'),
+            (self.datasets, 'dataset'),
+        ):
+            value = record.get(field)
+            if value:
+                counter[value] += 1
+
+        benchmark_metrics = record.get('benchmark_metrics') or {}
+        if isinstance(benchmark_metrics, dict):
+            for metric_name, value in benchmark_metrics.items():
+                self.metrics[metric_name] += 1
+                self._range(f"benchmark_metrics.{metric_name}").add(value)
+                if check_result_value(value) is not None:
+                    self.unstorable[metric_name] += 1
+
+        for field in NUMERIC_FIELDS:
+            value = record.get(field)
+            if value is not None:
+                self._range(field).add(value)
+        for metric_field in METRIC_FIELDS:
+            value = metric_field.extract(record)
+            if value is not None and check_result_value(value) is not None:
+                self.unstorable[metric_field.metric] += 1
+
+        if len(self.samples) < SAMPLE_RECORDS:
+            self.samples.append({
+                'model_name': record.get('model_name'),
+                'baseline': record.get('baseline'),
+                'benchmark': record.get('benchmark'),
+                'dataset': record.get('dataset'),
+                'density_target': record.get('density_target'),
+                'aux_memory': record.get('aux_memory'),
+                'metrics': list(benchmark_metrics) if isinstance(benchmark_metrics, dict) else [],
+            })
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Everything collected, as plain JSON-serializable values."""
+        return {
+            'records': self.records,
+            'records_per_file': dict(self.records_per_file),
+            'baselines': dict(sorted(self.baselines.items())),
+            'models': dict(sorted(self.models.items())),
+            'benchmarks': dict(sorted(self.benchmarks.items())),
+            'datasets': dict(sorted(self.datasets.items())),
+            'metrics': dict(sorted(self.metrics.items())),
+            'missing_fields': dict(self.missing_fields),
+            'ranges': {name: value_range.to_dict() for name, value_range in sorted(self.ranges.items())},
+            'unstorable_values': dict(self.unstorable),
+            'samples': self.samples,
+        }
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    def print_report(self):
+        """Print the human-readable dry-run report."""
+        print("\nSample record analysis (first 5):")
+        print("-" * 80)
+        for i, sample in enumerate(self.samples):
+            target_density = sample['density_target']
+            target_sparsity = 100.0 - target_density if isinstance(target_density, (int, float)) else 'None'
+            print(f"\nRecord {i+1}:")
+            print(f"  Model: {sample['model_name']}")
+            print(f"  Baseline: {sample['baseline']}")
+            print(f"  Benchmark: {sample['benchmark']}")
+            print(f"  Dataset: {sample['dataset']}")
+            print(f"  Target Density: {target_density}% -> Sparsity: {target_sparsity}%")
+            print(f"  Aux Memory: {sample['aux_memory']}")
+            print(f"  Metrics: {sample['metrics']}")
+
+        print("\n" + "=" * 80)
+        print("Summary Statistics")
+        print("=" * 80)
+
+        if len(self.records_per_file) > 1:
+            print(f"\nFiles ({len(self.records_per_file)}):")
+            for path, count in self.records_per_file.items():
+                print(f"  {path}: {count} records")
+
+        for title, counter in (
+            ('Baselines', self.baselines),
+            ('Models', self.models),
+            ('Benchmarks', self.benchmarks),
+            ('Datasets', self.datasets),
+            ('Metrics', self.metrics),
+        ):
+            print(f"\nUnique {title} ({len(counter)}):")
+            for name, count in sorted(counter.items()):
+                print(f"  {name}: {count} records")
+
+        print("\nNumeric Ranges:")
+        for name, value_range in sorted(self.ranges.items()):
+            print(f"  {name}: {value_range.describe()}")
+
+        print("\n" + "=" * 80)
+        print("Data Validation")
+        print("=" * 80)
+
+        if self.missing_fields:
+            print("\nRecords with missing required fields:")
+            for field, count in self.missing_fields.items():
+                print(f"  {field}: {count} records")
+        else:
+            print("\nAll records have required fields ✓")
+
+        if self.unstorable:
+            print("\nValues the results table cannot store (quarantined on upload):")
+            for name, count in self.unstorable.most_common():
+                print(f"  {name}: {count} values")
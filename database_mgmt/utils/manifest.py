@@ -0,0 +1,192 @@
+"""
+Content-hash manifest of records already uploaded.
+
+Each uploaded JSONL line is recorded in a local SQLite file as a hash of its
+bytes, together with the record's identity (benchmark, dataset, baseline,
+model and density target, i.e. the configuration it maps to). On the next
+upload a line whose hash is already known is skipped before it is even
+parsed, so re-uploading an appended file only does work for the new lines.
+Every line hash is kept, so lines sharing an identity (several runs of one
+configuration) are all skipped; a new line with an identity uploaded before
+is counted as a change.
+
+Entries are staged once the results of their record were queued and only
+persisted once those result batches have been written, using the same
+batch watermark as the checkpoint journal. Several files may be uploaded
+at once: the line hash and staged entries are kept per thread.
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+DEFAULT_MANIFEST_PATH = Path.home() / '.cache' / 'skylight' / 'manifest.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploaded_lines (
+    scope TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    PRIMARY KEY (scope, content_hash)
+);
+"""
+
+# Earlier manifests kept one line hash per record identity
+_MIGRATE_RECORDS = """
+INSERT OR IGNORE INTO uploaded_lines (scope, content_hash, record_key)
+    SELECT scope, content_hash, record_key FROM uploaded_records;
+DROP TABLE uploaded_records;
+"""
+
+
+def line_hash(line: bytes) -> str:
+    """Hash of one stripped JSONL line."""
+    return hashlib.blake2b(line, digest_size=16).hexdigest()
+
+
+def record_key(record: Dict[str, Any]) -> str:
+    """Identity of a record: the natural key of the configuration it uploads."""
+    density = record.get('density_target')
+    return json.dumps([
+        record.get('benchmark'),
+        record.get('dataset'),
+        record.get('baseline'),
+        record.get('model_name'),
+        round(float(density), 2) if density is not None else None,
+    ], separators=(',', ':'))
+
+
+class UploadManifest:
+    """Remembers which record contents were uploaded to one Supabase project."""
+
+    def __init__(self, path: Path, scope: str):
+        """
+        Args:
+            path: SQLite file to use (created if missing)
+            scope: Identifies the database the records were uploaded to (the Supabase URL)
+        """
+        self.path = Path(path)
+        self.scope = scope
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Used from the file worker threads, always under self._lock
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript(_SCHEMA)
+        if self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'uploaded_records'"
+        ).fetchone():
+            self._conn.executescript(_MIGRATE_RECORDS)
+
+        rows = self._conn.execute(
+            'SELECT content_hash, record_key FROM uploaded_lines WHERE scope = ?', (self.scope,)
+        ).fetchall()
+        # Line hashes uploaded or claimed in this upload, and the identities
+        # uploaded before it (a new line for one of those is a change)
+        self._hashes = {content_hash for content_hash, _ in rows}
+        self._keys = {key for _, key in rows}
+
+        # Per thread: hash of the last line that passed the filter, for the
+        # record parsed from it, and entries of the current flush
+        self._local = threading.local()
+        # (last batch number, entries) awaiting commit
+        self._marks: Deque[Tuple[int, List[Tuple[str, str]]]] = deque()
+
+    @property
+    def last_hash(self) -> Optional[str]:
+        """Hash of the last line this thread let through the filter."""
+        return getattr(self._local, 'last_hash', None)
+
+    @property
+    def _staged(self) -> List[Tuple[str, str]]:
+        if not hasattr(self._local, 'staged'):
+            self._local.staged = []
+        return self._local.staged
+
+    def known_hashes(self) -> FrozenSet[str]:
+        """Snapshot of the line hashes uploaded so far, for worker processes."""
+        with self._lock:
+            return frozenset(self._hashes)
+
+    def hash_filter(self, counts: Dict[str, int]) -> Callable[[str], bool]:
+        """
+        Build a callback that takes a line hash and returns True to skip the line.
+
+        Known lines are counted in `counts['unchanged']`; for the others,
+        `last_hash` is set.
+        """
+        def skip(content_hash: str) -> bool:
+            if content_hash in self._hashes:
+                counts['unchanged'] += 1
+                return True
+            self._local.last_hash = content_hash
+            return False
+        return skip
+
+    def line_filter(self, counts: Dict[str, int]) -> Callable[[bytes], bool]:
+        """Like hash_filter, but as a skip_line callback for iter_jsonl_with_offsets."""
+        skip_hash = self.hash_filter(counts)
+        return lambda line: skip_hash(line_hash(line))
+
+    def claim(self, content_hash: str):
+        """
+        Skip further lines with this hash in this upload.
+
+        Called as a record is processed, so a duplicate line later in the same
+        file is not uploaded twice; nothing is persisted until stage() and
+        advance() say its results were written.
+        """
+        with self._lock:
+            self._hashes.add(content_hash)
+
+    def stage(self, key: str, content_hash: str) -> str:
+        """
+        Note a line whose results were queued for upload; advance() persists it.
+
+        Args:
+            key: record_key() of the line's record
+            content_hash: line_hash() of the line
+
+        Returns:
+            'changed' if a record with the same identity was uploaded before, else 'new'
+        """
+        self._staged.append((key, content_hash))
+        return 'changed' if key in self._keys else 'new'
+
+    def mark(self, last_batch: int):
+        """Tie the records staged since the last mark to batch number `last_batch`."""
+        with self._lock:
+            self._marks.append((last_batch, self._staged))
+        self._local.staged = []
+
+    def advance(self, committed_through: int) -> int:
+        """
+        Persist staged records whose result batches have all been written.
+
+        Returns:
+            Number of records persisted
+        """
+        with self._lock:
+            entries = []
+            while self._marks and self._marks[0][0] <= committed_through:
+                entries.extend(self._marks.popleft()[1])
+            if entries:
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO uploaded_lines (scope, content_hash, record_key) VALUES (?, ?, ?)',
+                        ((self.scope, content_hash, key) for key, content_hash in entries)
+                    )
+        return len(entries)
+
+    def clear(self):
+        """Forget every uploaded record for this scope."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM uploaded_lines WHERE scope = ?', (self.scope,))
+            self._keys.clear()
+            self._hashes.clear()
+
+    def close(self):
+        self._conn.close()
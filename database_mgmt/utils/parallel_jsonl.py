@@ -0,0 +1,253 @@
+"""
+Multi-process JSONL parsing for large experiment dumps.
+
+Every record carries a deeply nested `config` dict, so `json.loads` is
+CPU-bound and a single process parses on one core. ParallelJsonlReader splits
+the file into newline-aligned byte ranges and parses them in a process pool.
+Records come back in file order as compact tuples of RECORD_FIELDS, which
+pickle faster than dicts, and are rebuilt with record_from_tuple.
+
+The nested `config` blob crosses the process boundary as JSON text and is
+rebuilt as a RawJson, so the parent never decodes it: unpickling the nested
+dicts would cost the parent about as much as parsing them.
+
+orjson is used for parsing when it is installed (pip install orjson), with
+the standard library json module as the fallback. Lines orjson would read
+differently from the serial reader (integers beyond 64 bits, which orjson
+rejects or turns into floats) are parsed with json, so both readers accept
+the same input and produce the same records.
+
+Compressed files cannot be split by byte range, so for them the parent
+decompresses the stream and hands line-aligned chunks of it to the workers.
+"""
+
+import os
+import re
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    _loads = json.loads
+    _dumps = lambda value: json.dumps(value, separators=(',', ':')).encode()
+    JSON_BACKEND = 'json'
+
+from utils.jsonl_reader import detect_compression, open_jsonl
+from utils.manifest import line_hash
+from utils.raw_json import RawJson
+from utils.result_rows import METRIC_FIELDS
+
+# Fields of a JSONL record that the uploader reads, in tuple order
+RECORD_FIELDS = (
+    'baseline', 'model_name', 'benchmark', 'dataset', 'density_target', 'config',
+    'benchmark_metrics', *(metric_field.source for metric_field in METRIC_FIELDS),
+)
+
+# Index of the config blob, sent as JSON text
+CONFIG_FIELD = RECORD_FIELDS.index('config')
+
+# Placeholder for a field absent from the record (Ellipsis survives pickling as a singleton)
+MISSING = ...
+
+# A run of digits too long for a 64-bit integer
+_LONG_DIGITS = re.compile(rb'\d{20,}')
+
+# Bytes per range handed to a worker
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Ranges queued per worker, bounding how far parsing runs ahead of the consumer
+RANGES_IN_FLIGHT_PER_WORKER = 2
+
+ParsedRecord = Tuple[int, Optional[str], Tuple[Any, ...]]
+
+# Set in each worker by _init_worker
+_known_hashes: Optional[FrozenSet[str]] = None
+_hash_lines = False
+
+
+def record_from_tuple(values: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Rebuild a record dict from a compact tuple, leaving out missing fields."""
+    record = {field: value for field, value in zip(RECORD_FIELDS, values) if value is not MISSING}
+    if isinstance(record.get('config'), bytes):
+        record['config'] = RawJson(record['config'])
+    return record
+
+
+def _init_worker(known_hashes: Optional[FrozenSet[str]], hash_lines: bool):
+    global _known_hashes, _hash_lines
+    _known_hashes = known_hashes
+    _hash_lines = hash_lines
+
+
+def _parse_range(filepath: str, start: int, end: int) -> Tuple[List[ParsedRecord], int, List[str]]:
+    """
+    Parse the lines in [start, end) in a worker process.
+
+    Returns:
+        (records as (end offset, line hash, field tuple), lines skipped as
+        known, warnings for malformed lines)
+    """
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _parse_chunk(data, start)
+
+
+def _parse_chunk(data: bytes, start: int) -> Tuple[List[ParsedRecord], int, List[str]]:
+    """Parse whole lines of `data`, which begins at offset `start` of the (decompressed) stream."""
+    records = []
+    skipped = 0
+    warnings = []
+    offset = start
+    for line in data.splitlines(keepends=True):
+        line_start = offset
+        offset += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        content_hash = line_hash(line) if _hash_lines else None
+        if _known_hashes is not None and content_hash in _known_hashes:
+            skipped += 1
+            continue
+        try:
+            record = _loads_line(line)
+        except ValueError as e:
+            warnings.append(f"Warning: Skipping line at byte {line_start} due to JSON error: {e}")
+            continue
+        if not isinstance(record, dict):
+            warnings.append(f"Warning: Skipping line at byte {line_start}: not a JSON object")
+            continue
+        values = [record.get(field, MISSING) for field in RECORD_FIELDS]
+        if values[CONFIG_FIELD] is not MISSING:
+            values[CONFIG_FIELD] = _encode_config(values[CONFIG_FIELD])
+        records.append((offset, content_hash, tuple(values)))
+    return records, skipped, warnings
+
+
+def _loads_line(line: bytes) -> Any:
+    """Parse one line to the same value the json module (the serial reader) would."""
+    if _loads is json.loads:
+        return json.loads(line)
+    if _LONG_DIGITS.search(line):
+        # May hold an integer beyond 64 bits, which orjson rejects or turns into a float
+        return json.loads(line)
+    try:
+        return _loads(line)
+    except ValueError:
+        # Let the json module decide, so both readers skip the same lines
+        return json.loads(line)
+
+
+def _encode_config(config: Any) -> bytes:
+    try:
+        return _dumps(config)
+    except TypeError:
+        # orjson rejects integers beyond 64 bits; the json module does not
+        return json.dumps(config, separators=(',', ':')).encode()
+
+
+def split_ranges(filepath: str, start: int = 0, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) byte ranges of about chunk_bytes, each ending just after a newline."""
+    size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        pos = start
+        while pos < size:
+            end = pos + chunk_bytes
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            end = min(end, size)
+            yield pos, end
+            pos = end
+
+
+def read_chunks(filepath: str, start: int = 0, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[Tuple[int, bytes]]:
+    """Yield (start offset, data) chunks of a compressed file's stream, each ending just after a newline."""
+    with open_jsonl(filepath, start) as f:
+        pos = start
+        pending = b''
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                break
+            data = pending + data
+            cut = data.rfind(b'\n') + 1
+            if cut == 0:
+                # No newline yet: keep reading until the line ends
+                pending = data
+                continue
+            pending = data[cut:]
+            yield pos, data[:cut]
+            pos += cut
+        if pending:
+            yield pos, pending
+
+
+class ParallelJsonlReader:
+    """Parses a JSONL file in a process pool, yielding records in file order."""
+
+    def __init__(
+        self,
+        filepath: str,
+        workers: Optional[int] = None,
+        start: int = 0,
+        warn: bool = True,
+        known_hashes: Optional[FrozenSet[str]] = None,
+        hash_lines: bool = False,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES
+    ):
+        """
+        Args:
+            filepath: Path to the JSONL file (plain, gzip or zstd)
+            workers: Worker processes (None = one per CPU)
+            start: Byte offset to start reading from (must be at a line start)
+            warn: Print a warning for each malformed line
+            known_hashes: Line hashes to skip without parsing (implies hash_lines)
+            hash_lines: Return the hash of each line alongside its record
+            chunk_bytes: Approximate bytes per range handed to a worker
+        """
+        self.filepath = filepath
+        self.workers = workers or os.cpu_count() or 1
+        self.start = start
+        self.warn = warn
+        self.known_hashes = known_hashes
+        self.hash_lines = hash_lines or known_hashes is not None
+        self.chunk_bytes = chunk_bytes
+        self.skipped = 0
+
+    def __iter__(self) -> Iterator[ParsedRecord]:
+        """Yield (end offset, line hash or None, field tuple) per record."""
+        if detect_compression(self.filepath):
+            tasks = ((_parse_chunk, data, start) for start, data in read_chunks(self.filepath, self.start, self.chunk_bytes))
+        else:
+            tasks = (
+                (_parse_range, self.filepath, start, end)
+                for start, end in split_ranges(self.filepath, self.start, self.chunk_bytes)
+            )
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.known_hashes, self.hash_lines)
+        ) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(*task))
+                if len(pending) >= self.workers * RANGES_IN_FLIGHT_PER_WORKER:
+                    yield from self._collect(pending.popleft())
+            while pending:
+                yield from self._collect(pending.popleft())
+
+    def _collect(self, future) -> List[ParsedRecord]:
+        records, skipped, warnings = future.result()
+        self.skipped += skipped
+        if self.warn:
+            for warning in warnings:
+                print(warning)
+        return records
@@ -0,0 +1,138 @@
+"""
+Undecoded JSON values forwarded verbatim to JSONB columns.
+
+A record's `config` blob is only needed when its configuration is inserted,
+and then only to be stored as JSONB. RawJson keeps the blob as the JSON text
+it arrived as; execute_with_raw_json splices that text into the request body
+unchanged, so a blob is never decoded on a cache hit and never decoded and
+re-encoded on a miss.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from postgrest import APIError, APIResponse
+from httpx import Headers
+
+
+class RawJson:
+    """JSON text whose value is decoded only on first access."""
+
+    __slots__ = ('raw', '_value')
+
+    _UNDECODED = object()
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._value = RawJson._UNDECODED
+
+    @property
+    def value(self) -> Any:
+        """The decoded value (decoded once, on first access)."""
+        if self._value is RawJson._UNDECODED:
+            self._value = json.loads(self.raw)
+        return self._value
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __repr__(self) -> str:
+        return f"RawJson({len(self.raw)} bytes)"
+
+
+def decode_raw(value: Any) -> Any:
+    """Return the decoded value of a RawJson, or the value itself."""
+    return value.value if isinstance(value, RawJson) else value
+
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, RawJson):
+        return value.raw
+    return json.dumps(value, default=str, separators=(',', ':')).encode()
+
+
+def dumps_rows(rows: List[Dict[str, Any]]) -> bytes:
+    """Encode rows as a JSON array, copying RawJson values in verbatim."""
+    return b'[' + b','.join(
+        b'{' + b','.join(
+            json.dumps(column).encode() + b':' + _encode_value(value)
+            for column, value in row.items()
+        ) + b'}'
+        for row in rows
+    ) + b']'
+
+
+def has_raw_json(rows: List[Dict[str, Any]]) -> bool:
+    return any(isinstance(value, RawJson) for row in rows for value in row.values())
+
+
+def _request_args(builder, content: bytes) -> Dict[str, Any]:
+    """Arguments for session.request() sending the builder's request with `content` as its body."""
+    request = builder.request
+    headers = Headers({'Content-Type': 'application/json'})
+    headers.update(request.headers)
+    return {
+        'method': request.http_method,
+        'url': str(request.path),
+        'content': content,
+        'params': request.params,
+        'headers': headers,
+        'auth': request.auth,
+    }
+
+
+def _raw_json_request(builder) -> Optional[Dict[str, Any]]:
+    """Arguments for session.request() sending the builder's rows verbatim, or None without RawJson values."""
+    request = builder.request
+    rows = request.json if isinstance(request.json, list) else [request.json]
+    if not has_raw_json(rows):
+        return None
+    return _request_args(builder, dumps_rows(rows))
+
+
+def _api_response(response) -> APIResponse:
+    if response.is_success:
+        return APIResponse.from_http_request_response(response)
+    try:
+        error = response.json()
+    except ValueError:
+        error = {'message': response.text, 'code': str(response.status_code)}
+    raise APIError(error if isinstance(error, dict) else {'message': str(error)})
+
+
+def execute_with_raw_json(builder) -> APIResponse:
+    """
+    Execute a postgrest insert/upsert builder whose rows may hold RawJson values.
+
+    The builder still computes the path, `columns` and Prefer headers from the
+    rows; only the body is encoded here instead of by the HTTP client.
+    Builders without RawJson values are executed normally.
+    """
+    request_args = _raw_json_request(builder)
+    if request_args is None:
+        return builder.execute()
+    return _api_response(builder.request.session.request(**request_args))
+
+
+async def execute_with_raw_json_async(builder) -> APIResponse:
+    """execute_with_raw_json for builders of the async supabase client."""
+    request_args = _raw_json_request(builder)
+    if request_args is None:
+        return await builder.execute()
+    return _api_response(await builder.request.session.request(**request_args))
+
+
+def execute_with_body(builder, content: bytes) -> APIResponse:
+    """
+    Execute a postgrest insert/upsert builder with a body encoded by the caller.
+
+    The builder is made from one prototype row holding every column, so it
+    computes the path, `columns` and Prefer headers as usual; `content` is
+    the JSON array actually sent (e.g. from dumps_result_rows).
+    """
+    return _api_response(builder.request.session.request(**_request_args(builder, content)))
+
+
+async def execute_with_body_async(builder, content: bytes) -> APIResponse:
+    """execute_with_body for builders of the async supabase client."""
+    return _api_response(await builder.request.session.request(**_request_args(builder, content)))
@@ -0,0 +1,60 @@
+"""
+Reject file for result rows the database refused.
+
+When a batch fails with a non-transient error, the writer bisects it until
+the rows responsible are isolated; each of them is appended here as one
+JSON line holding the row and the error, so the rest of the batch can still
+be written and the rejects inspected or fixed and uploaded later.
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+
+def default_reject_path(jsonl_filepath: str) -> Path:
+    """Reject file used when --reject-file is not given: next to the input file."""
+    return Path(f"{jsonl_filepath}.rejects.jsonl")
+
+
+class RejectFile:
+    """Appends rejected rows to a JSONL file, opened on the first reject."""
+
+    def __init__(self, path: Path, columns: Optional[Sequence[str]] = None):
+        """
+        Args:
+            path: JSONL file to append to
+            columns: Column names of rows written as tuples (see utils/result_rows.py)
+        """
+        self.path = Path(path)
+        self.columns = columns
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def write(self, rows: List[Union[Dict[str, Any], Sequence[Any]]], error: Exception):
+        """Record rows refused with `error`."""
+        lines = ''.join(
+            json.dumps({
+                'row': row if isinstance(row, dict) else dict(zip(self.columns, row)),
+                'error': str(error),
+                # SQLSTATE of a direct connection's error (--pg-dsn), or the PostgREST code
+                'code': getattr(error, 'sqlstate', None) or getattr(error, 'code', None),
+                'rejected_at': datetime.now().isoformat(),
+            }, default=str) + '\n'
+            for row in rows
+        )
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(lines)
+            self._file.flush()
+            self.count += len(rows)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,89 @@
+"""
+Result rows: which record fields become results, and how rows are encoded.
+
+Every record yields one result per entry of its `benchmark_metrics` (the
+primary metrics of its dataset), plus one per METRIC_FIELDS entry whose
+field is present in the record (stored as non-primary metrics). Adding a
+derived metric means adding an entry to METRIC_FIELDS; the entity pass,
+the row builder, the parallel parser and the dry-run analysis all read it.
+
+Result rows are plain tuples in RESULT_COLUMNS order (followed by the id
+with --deterministic-ids) rather than dicts: they are built, batched,
+retried and bisected without per-row dicts, and are only turned into JSON
+or COPY rows when a batch is sent.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Columns of a result row tuple, in order
+RESULT_COLUMNS = ('configuration_id', 'dataset_metric_id', 'experimental_run_id', 'value')
+
+# Columns of a result row tuple carrying a deterministic id
+RESULT_COLUMNS_WITH_ID = RESULT_COLUMNS + ('id',)
+
+# Conflict target of results, mirroring its UNIQUE constraint
+RESULT_KEY_COLUMNS = RESULT_COLUMNS[:3]
+
+# A result row: values of RESULT_COLUMNS (or RESULT_COLUMNS_WITH_ID), in order
+ResultRow = Tuple[Any, ...]
+
+
+class MetricField(NamedTuple):
+    """A per-record scalar stored as a non-primary metric."""
+
+    metric: str
+    # Record field holding the value (None = the metric name)
+    field: Optional[str] = None
+    # Factor applied to the value before it is stored
+    scale: float = 1
+
+    @property
+    def source(self) -> str:
+        """Record field the value is read from."""
+        return self.field or self.metric
+
+    def extract(self, record: Dict[str, Any]) -> Any:
+        """The value to store for a record, or None if it has none."""
+        value = record.get(self.source)
+        if self.scale == 1 or type(value) not in (int, float):
+            # Anything but a number is left for the value checks to refuse
+            return value
+        return value * self.scale
+
+
+# Per-record scalar fields stored as non-primary metrics, in upload order
+METRIC_FIELDS: Tuple[MetricField, ...] = (
+    MetricField('average_local_error'),
+    MetricField('average_density', scale=100),  # Fraction stored as a percentage
+    MetricField('overall_score'),
+    MetricField('aux_memory'),
+)
+
+# A record's results before its configuration has an id:
+# (configuration cache key, [(dataset_metric_id, value), ...])
+ResultGroup = Tuple[Tuple, List[Tuple[str, Any]]]
+
+
+def dumps_result_rows(rows: Iterable[ResultRow], columns: Sequence[str]) -> bytes:
+    """
+    Encode result tuples as the JSON array of objects PostgREST expects.
+
+    Ids are UUID strings (never NULL in an upload) and values finite numbers
+    (see utils/result_values.py), so each row is formatted directly instead
+    of going through a dict and the JSON encoder.
+    """
+    fields = ','.join(f'"{column}":%r' if column == 'value' else f'"{column}":"%s"' for column in columns)
+    template = '{' + fields + '}'
+    return ('[' + ','.join([template % row for row in rows]) + ']').encode()
+
+
+def result_rows_size(rows: List[ResultRow], columns: Sequence[str]) -> int:
+    """
+    Length of dumps_result_rows(rows, columns) without building it.
+
+    The rows encoded as JSON arrays differ from the objects only by the
+    `"column":` prefix of each value.
+    """
+    key_bytes = sum(len(column) + 3 for column in columns)
+    return len(json.dumps(rows, separators=(',', ':'))) + len(rows) * key_bytes
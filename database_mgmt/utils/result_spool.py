@@ -0,0 +1,150 @@
+"""
+Local spool of result batches that could not be written.
+
+With --spool, a result batch that still fails once its retries are spent
+(a dropped network, a database that stays unreachable) is appended to a
+local SQLite file instead of failing the upload. The upload goes on, and
+the spooled batch counts as committed for the checkpoint journal and the
+manifest: its rows were computed and are safe on disk, so neither --resume
+nor the next upload processes those records again.
+
+`upload.py --replay-spool PATH` later pushes the spooled rows in bulk and
+removes them once written. Replay skips rows that are already stored, so
+a batch that was applied after all, or a replay that is interrupted and run
+again, does not duplicate results.
+
+Each batch is committed before append() returns (WAL journal, synchronous
+writes), so a crash right after spooling loses nothing.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from utils.result_rows import ResultRow
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spooled_batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    error TEXT,
+    spooled_at TEXT NOT NULL
+);
+"""
+
+
+def default_spool_path(jsonl_filepath: str) -> Path:
+    """Spool used when --spool is given without a path: next to the input file."""
+    return Path(f"{jsonl_filepath}.spool.sqlite3")
+
+
+class ResultSpool:
+    """Write-ahead spool of result batches for one database."""
+
+    def __init__(self, path: Path, scope: str):
+        """
+        Args:
+            path: SQLite file to use (created if missing)
+            scope: Identifies the database the rows belong to (the Supabase URL)
+        """
+        self.path = Path(path)
+        self.scope = scope
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Appended to from the result writer threads, always under self._lock
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')
+        self._conn.executescript(_SCHEMA)
+
+        # Appended by this process
+        self.batches_spooled = 0
+        self.rows_spooled = 0
+
+    def append(self, rows: List[ResultRow], columns: Sequence[str], error: Optional[Exception] = None):
+        """Durably store one batch of result rows (tuples of `columns`)."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT INTO spooled_batches (scope, columns, rows, row_count, error, spooled_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (
+                        self.scope,
+                        json.dumps(list(columns)),
+                        json.dumps(rows, separators=(',', ':'), default=str),
+                        len(rows),
+                        str(error) if error is not None else None,
+                        datetime.now().isoformat(),
+                    )
+                )
+            self.batches_spooled += 1
+            self.rows_spooled += len(rows)
+
+    def pending(self) -> Tuple[int, int]:
+        """(batches, rows) spooled for this database and not replayed yet."""
+        with self._lock:
+            batches, rows = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(row_count), 0) FROM spooled_batches WHERE scope = ?',
+                (self.scope,)
+            ).fetchone()
+        return batches, rows
+
+    def other_scopes(self) -> List[str]:
+        """Databases other than this one that have batches in the spool."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT scope FROM spooled_batches WHERE scope != ?', (self.scope,)
+            ).fetchall()
+        return [scope for scope, in rows]
+
+    def iter_batches(self) -> Iterator[Tuple[int, Tuple[str, ...], List[ResultRow]]]:
+        """
+        Yield (batch id, columns, rows) for this database, oldest first.
+
+        Batches are read one at a time, so a large spool is never loaded whole.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                found = self._conn.execute(
+                    'SELECT id, columns, rows FROM spooled_batches WHERE scope = ? AND id > ? ORDER BY id LIMIT 1',
+                    (self.scope, last_id)
+                ).fetchone()
+            if found is None:
+                return
+            last_id, columns, rows = found
+            yield last_id, tuple(json.loads(columns)), [tuple(row) for row in json.loads(rows)]
+
+    def iter_chunks(self, max_rows: int) -> Iterator[Tuple[List[int], Tuple[str, ...], List[ResultRow]]]:
+        """
+        Yield (batch ids, columns, rows) joining consecutive batches with the
+        same columns until a chunk holds at least `max_rows` rows.
+        """
+        batch_ids: List[int] = []
+        chunk_columns: Optional[Tuple[str, ...]] = None
+        chunk_rows: List[ResultRow] = []
+        for batch_id, columns, rows in self.iter_batches():
+            if batch_ids and (columns != chunk_columns or len(chunk_rows) >= max_rows):
+                yield batch_ids, chunk_columns, chunk_rows
+                batch_ids, chunk_rows = [], []
+            batch_ids.append(batch_id)
+            chunk_columns = columns
+            chunk_rows.extend(rows)
+        if batch_ids:
+            yield batch_ids, chunk_columns, chunk_rows
+
+    def remove(self, batch_ids: List[int]):
+        """Drop batches whose rows have been written."""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany('DELETE FROM spooled_batches WHERE id = ?', [(i,) for i in batch_ids])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
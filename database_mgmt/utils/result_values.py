@@ -0,0 +1,102 @@
+"""
+Pre-flight checks for result values.
+
+`results.value` is DECIMAL(15,6): at most 9 digits before the decimal point,
+and no NaN or infinity. Records sometimes carry sentinels such as
+`aux_memory: 9223372036854775807`, and a single such value makes the
+database refuse the whole batch it is in. Values are therefore checked
+while result rows are built, before any request is made, and offending
+rows are quarantined instead of being uploaded.
+"""
+
+import math
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.reject_file import RejectFile
+
+# Precision and scale of results.value
+RESULT_VALUE_PRECISION = 15
+RESULT_VALUE_SCALE = 6
+
+# Smallest magnitude that no longer fits once rounded to the column scale
+RESULT_VALUE_LIMIT = 10 ** (RESULT_VALUE_PRECISION - RESULT_VALUE_SCALE) - 0.5 * 10 ** -RESULT_VALUE_SCALE
+
+_NUMBER_TYPES = frozenset((int, float))
+
+
+def check_result_value(value: Any) -> Optional[str]:
+    """
+    Check a value against the results.value column.
+
+    Returns:
+        Why the value cannot be stored, or None if it can
+    """
+    if value is None:
+        return 'missing'
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return f'not a number ({type(value).__name__})'
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return 'infinite'
+    if abs(value) >= RESULT_VALUE_LIMIT:
+        return f'out of range for DECIMAL({RESULT_VALUE_PRECISION},{RESULT_VALUE_SCALE})'
+    return None
+
+
+def fits_result_value(value: Any) -> bool:
+    """
+    Fast check for the common case: a plain int or float that fits the column.
+
+    False does not mean the value is refused; check_result_value decides.
+    """
+    # NaN fails the comparison, infinities the bounds
+    return type(value) in _NUMBER_TYPES and -RESULT_VALUE_LIMIT < value < RESULT_VALUE_LIMIT
+
+
+class ValueQuarantine:
+    """Holds back result rows whose value the database would refuse, counting them per metric."""
+
+    def __init__(self, reject_file: Optional[RejectFile] = None):
+        """
+        Args:
+            reject_file: Where quarantined rows are recorded (None = only counted)
+        """
+        self.reject_file = reject_file
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def admit(self, metric_name: str, value: Any, row: Callable[[], Dict[str, Any]]) -> bool:
+        """
+        Check a result value.
+
+        Args:
+            metric_name: Metric the value was recorded for
+            value: The value
+            row: Builds the result row for the reject file (only called for
+                quarantined values)
+
+        Returns:
+            True if the value can be uploaded; False if it was quarantined
+        """
+        reason = check_result_value(value)
+        if reason is None:
+            return True
+        with self._lock:
+            self.counts[metric_name] += 1
+        if self.reject_file is not None:
+            self.reject_file.write([dict(row(), metric=metric_name)], ValueError(f"quarantined: {reason}"))
+        return False
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.counts.values())
+
+    def describe(self) -> List[str]:
+        """Per-metric counts, most frequent first."""
+        with self._lock:
+            return [f"{metric}: {count}" for metric, count in self.counts.most_common()]
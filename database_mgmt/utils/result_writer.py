@@ -0,0 +1,388 @@
+"""
+Concurrent writer for result batches.
+
+Batches are sent from a thread pool while the producer keeps processing
+records. At most `concurrency` batches are in flight; further submissions
+block until a slot frees up, so a slow database applies backpressure to the
+producer instead of letting pending rows pile up in memory.
+
+Transient failures are retried with backoff. A batch refused for its
+content is bisected until the offending rows are isolated; those go to a
+reject file and the rest of the batch is written. A batch that still fails
+can be handed to a spool (see utils/result_spool.py) instead of failing the
+upload.
+
+AsyncResultBatchWriter has the same interface but sends batches as
+coroutines on an event loop (see utils/async_engine.py) instead of threads.
+"""
+
+import json
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from utils.adaptive_batcher import AdaptiveBatchSizer
+from utils.async_engine import EventLoopThread
+from utils.reject_file import RejectFile
+from utils.result_rows import ResultRow
+from utils.retry import RetryPolicy, is_transient
+
+
+class ResultBatchWriter:
+    """Writes result rows in fixed-size batches with bounded concurrency."""
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[ResultRow]], Any],
+        concurrency: int = 4,
+        batch_size: int = 20,
+        force_push: bool = False,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        retry: Optional[RetryPolicy] = None,
+        replay_batch: Optional[Callable[[List[ResultRow]], Any]] = None,
+        reject_file: Optional[RejectFile] = None,
+        payload_size: Optional[Callable[[List[ResultRow]], int]] = None,
+        spool_batch: Optional[Callable[[List[ResultRow], Exception], Any]] = None
+    ):
+        """
+        Args:
+            write_batch: Sends one batch to the database, raising on failure
+            concurrency: Maximum number of batches in flight
+            batch_size: Rows per batch when no sizer is given
+            force_push: Collect failed batches for retry instead of raising
+            sizer: Chooses rows per batch from feedback (fixed batch_size if None)
+            retry: Retries transient failures (None = a single attempt)
+            replay_batch: Idempotent variant of write_batch used on retries,
+                in case a timed-out attempt was applied after all
+            reject_file: Receives rows refused by the database, found by
+                bisecting the failed batch (None = the batch fails as a whole)
+            payload_size: Request body size of a batch, fed to the sizer
+                (None = the length of the batch as JSON)
+            spool_batch: Durably stores a batch that failed for good, which
+                then counts as committed (None = the failure is raised, or
+                collected with force_push, which takes precedence)
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.write_batch = write_batch
+        self.concurrency = concurrency
+        self.force_push = force_push
+        self.retry = retry or RetryPolicy(attempts=1)
+        self.replay_batch = replay_batch
+        self.reject_file = reject_file
+        self.payload_size = payload_size or (lambda batch: len(json.dumps(batch, default=str)))
+        self.spool_batch = spool_batch
+        self.sizer = sizer or AdaptiveBatchSizer(
+            initial_rows=batch_size, min_rows=batch_size, max_rows=batch_size, adaptive=False
+        )
+
+        self._create_workers(concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._failed_batches: List[List[ResultRow]] = []
+        self._error: Optional[Exception] = None
+        self._batches_submitted = 0
+        # Batch numbers written successfully beyond the contiguous prefix
+        self._committed_through = 0
+        self._committed_ahead = set()
+
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.rows_spooled = 0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def _create_workers(self, concurrency: int):
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='result-writer')
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def submit(self, rows: List[ResultRow]):
+        """
+        Queue rows for writing, blocking while `concurrency` batches are in flight.
+
+        Without force_push, a failed batch is re-raised from the next call to
+        submit or drain, matching the synchronous batch_insert_results.
+        """
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+
+        i = 0
+        while i < len(rows):
+            self._raise_pending_error()
+            self._acquire_slot()
+            # Size is chosen after acquiring a slot so it reflects the latest feedback
+            batch = rows[i:i + self.sizer.current_rows]
+            i += len(batch)
+            with self._lock:
+                self._batches_submitted += 1
+                batch_number = self._batches_submitted
+            future = self._start(batch, batch_number)
+            with self._lock:
+                self._in_flight.add(future)
+            future.add_done_callback(self._release)
+
+    def _acquire_slot(self):
+        self._slots.acquire()
+
+    def _start(self, batch: List[ResultRow], batch_number: int):
+        return self._executor.submit(self._write, batch, batch_number)
+
+    def drain(self) -> List[List[ResultRow]]:
+        """
+        Wait for all in-flight batches.
+
+        Returns:
+            Batches that failed (only when force_push is enabled)
+        """
+        with self._lock:
+            pending = list(self._in_flight)
+        for future in pending:
+            future.result()
+        self._finished_at = time.perf_counter()
+        self._raise_pending_error()
+
+        with self._lock:
+            failed, self._failed_batches = self._failed_batches, []
+        return failed
+
+    def close(self):
+        """Wait for in-flight batches and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    @property
+    def batches_submitted(self) -> int:
+        """Number of the most recently queued batch."""
+        with self._lock:
+            return self._batches_submitted
+
+    @property
+    def committed_through(self) -> int:
+        """Highest batch number such that it and every earlier batch were written."""
+        with self._lock:
+            return self._committed_through
+
+    @property
+    def flush_rows(self) -> int:
+        """Rows that fill every in-flight slot at the current batch size."""
+        return self.sizer.current_rows * self.concurrency
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput from the first submission to the last drain."""
+        if self._started_at is None:
+            return 0.0
+        elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+        return self.rows_written / elapsed if elapsed > 0 else 0.0
+
+    def _send(self, rows: List[ResultRow], describe: str):
+        self.retry.call(self.write_batch, rows, retry_fn=self.replay_batch, describe=describe)
+
+    def _write(self, batch: List[ResultRow], batch_number: int):
+        """Send one batch, recording the outcome instead of raising in the worker."""
+        payload_bytes = self.payload_size(batch)
+        started = time.perf_counter()
+        try:
+            try:
+                self._send(batch, f"Batch {batch_number}")
+                rejects = []
+            except Exception as e:
+                if self.reject_file is None or is_transient(e):
+                    raise
+                # The database refused the content: find the rows responsible
+                print(f"  Batch {batch_number} refused ({str(e)[:80]}), isolating the rejected rows...")
+                rejects = self._bisect(batch, e, batch_number)
+        except Exception as e:
+            self._settle_failure(batch, batch_number, payload_bytes, time.perf_counter() - started, e)
+            return
+        self._settle(batch, batch_number, payload_bytes, time.perf_counter() - started, rejects)
+
+    def _settle_failure(
+        self,
+        batch: List[ResultRow],
+        batch_number: int,
+        payload_bytes: int,
+        elapsed: float,
+        error: Exception
+    ):
+        """Record a batch that could not be written."""
+        self.sizer.record(len(batch), payload_bytes, elapsed, failed=True)
+        if self.spool_batch is not None and not self.force_push:
+            try:
+                self.spool_batch(batch, error)
+            except Exception as spool_error:
+                print(f"  Batch {batch_number} could not be spooled: {spool_error}")
+            else:
+                print(f"  Batch {batch_number} failed, spooled {len(batch)} rows: {str(error)[:100]}")
+                with self._lock:
+                    self.rows_spooled += len(batch)
+                    self._commit(batch_number)
+                return
+        with self._lock:
+            if self.force_push:
+                self._failed_batches.append(batch)
+                print(f"  Batch {batch_number} failed, will retry after the upload: {str(error)[:100]}")
+            elif self._error is None:
+                self._error = error
+
+    def _settle(
+        self,
+        batch: List[ResultRow],
+        batch_number: int,
+        payload_bytes: int,
+        elapsed: float,
+        rejects: List[Tuple[ResultRow, Exception]]
+    ):
+        """Record a written batch, minus the rows the database refused."""
+        # Recorded only once the whole batch is settled, so a retried batch is not rejected twice
+        for row, error in rejects:
+            self.reject_file.write([row], error)
+        rejected = len(rejects)
+        self.sizer.record(len(batch), payload_bytes, elapsed, failed=rejected > 0)
+        with self._lock:
+            self.rows_written += len(batch) - rejected
+            self.rows_rejected += rejected
+            self._commit(batch_number)
+
+    def _commit(self, batch_number: int):
+        """Advance the committed watermark past a settled batch (under self._lock)."""
+        self._committed_ahead.add(batch_number)
+        while self._committed_through + 1 in self._committed_ahead:
+            self._committed_through += 1
+            self._committed_ahead.discard(self._committed_through)
+
+    def _bisect(
+        self,
+        rows: List[ResultRow],
+        error: Exception,
+        batch_number: int
+    ) -> List[Tuple[ResultRow, Exception]]:
+        """
+        Write the halves of refused rows separately, down to single rows.
+
+        A refused request is applied atomically, so nothing of `rows` was
+        written.
+
+        Returns:
+            (row, error) for each row refused on its own
+
+        Raises:
+            A transient error that outlasted its retries
+        """
+        if len(rows) == 1:
+            return [(rows[0], error)]
+
+        middle = len(rows) // 2
+        rejects = []
+        for half in (rows[:middle], rows[middle:]):
+            try:
+                self._send(half, f"Part of batch {batch_number}")
+            except Exception as e:
+                if is_transient(e):
+                    raise
+                rejects.extend(self._bisect(half, e, batch_number))
+        return rejects
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight.discard(future)
+        self._slots.release()
+
+    def _raise_pending_error(self):
+        with self._lock:
+            error, self._error = self._error, None
+        if error is not None:
+            print(f"Error batch inserting results: {error}")
+            raise error
+
+
+class AsyncResultBatchWriter(ResultBatchWriter):
+    """
+    ResultBatchWriter whose batches are coroutines on an event loop.
+
+    submit, drain and close are called from synchronous code as before; an
+    asyncio.Semaphore on the loop bounds the batches in flight and makes
+    submit wait for a free slot. write_batch and replay_batch are coroutine
+    functions.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[ResultRow]], Awaitable[Any]],
+        engine: EventLoopThread,
+        **kwargs
+    ):
+        """
+        Args:
+            write_batch: Coroutine function sending one batch, raising on failure
+            engine: Event loop the batches run on
+            **kwargs: As for ResultBatchWriter (replay_batch is a coroutine function)
+        """
+        self.engine = engine
+        super().__init__(write_batch, **kwargs)
+
+    def _create_workers(self, concurrency: int):
+        self._slots = asyncio.Semaphore(concurrency)
+
+    def _acquire_slot(self):
+        self.engine.run(self._slots.acquire())
+
+    def _start(self, batch: List[ResultRow], batch_number: int):
+        return self.engine.submit(self._write_async(batch, batch_number))
+
+    def _release(self, future):
+        # The slot itself is released on the loop, by _write_async
+        with self._lock:
+            self._in_flight.discard(future)
+
+    def close(self):
+        """Wait for in-flight batches (the event loop belongs to the caller)."""
+        with self._lock:
+            pending = list(self._in_flight)
+        wait(pending)
+
+    async def _send_async(self, rows: List[ResultRow], describe: str):
+        await self.retry.call_async(self.write_batch, rows, retry_fn=self.replay_batch, describe=describe)
+
+    async def _write_async(self, batch: List[ResultRow], batch_number: int):
+        """Send one batch like ResultBatchWriter._write, then free its slot."""
+        payload_bytes = self.payload_size(batch)
+        started = time.perf_counter()
+        try:
+            try:
+                await self._send_async(batch, f"Batch {batch_number}")
+                rejects = []
+            except Exception as e:
+                if self.reject_file is None or is_transient(e):
+                    raise
+                print(f"  Batch {batch_number} refused ({str(e)[:80]}), isolating the rejected rows...")
+                rejects = await self._bisect_async(batch, e, batch_number)
+        except Exception as e:
+            self._settle_failure(batch, batch_number, payload_bytes, time.perf_counter() - started, e)
+            return
+        finally:
+            self._slots.release()
+        self._settle(batch, batch_number, payload_bytes, time.perf_counter() - started, rejects)
+
+    async def _bisect_async(
+        self,
+        rows: List[ResultRow],
+        error: Exception,
+        batch_number: int
+    ) -> List[Tuple[ResultRow, Exception]]:
+        """ResultBatchWriter._bisect, awaiting each half."""
+        if len(rows) == 1:
+            return [(rows[0], error)]
+
+        middle = len(rows) // 2
+        rejects = []
+        for half in (rows[:middle], rows[middle:]):
+            try:
+                await self._send_async(half, f"Part of batch {batch_number}")
+            except Exception as e:
+                if is_transient(e):
+                    raise
+                rejects.extend(await self._bisect_async(half, e, batch_number))
+        return rejects
@@ -0,0 +1,148 @@
+"""
+Retries with jittered exponential backoff for database requests.
+
+Only transient failures are retried: timeouts and dropped connections,
+HTTP 429 and 5xx responses, and the PostgreSQL/PostgREST errors that mean
+"try again later" (statement timeouts, deadlocks, connection limits). Any
+other error is a problem with the request itself and is raised at once, so
+callers can bisect the batch to find the rows responsible.
+"""
+
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from postgrest import APIError
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+# Attempts per request, counting the first one
+DEFAULT_RETRY_ATTEMPTS = 5
+
+# Backoff before retry n is drawn uniformly from [0, min(MAX, BASE * 2**n)] ("full jitter")
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+
+# SQLSTATE codes and classes worth retrying: connection exceptions (08),
+# insufficient resources (53), operator intervention (57, including
+# statement timeouts), serialization failures and deadlocks
+TRANSIENT_SQLSTATE_PREFIXES = ('08', '53', '57', '40001', '40P01')
+
+# PostgREST errors for an unreachable database or an exhausted connection pool
+TRANSIENT_POSTGREST_CODES = {'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003'}
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed request may succeed if sent again unchanged."""
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if psycopg is not None and isinstance(error, psycopg.Error):
+        # Direct connections (--pg-dsn): a lost connection has no SQLSTATE
+        if error.sqlstate is None:
+            return isinstance(error, psycopg.OperationalError)
+        return error.sqlstate.startswith(TRANSIENT_SQLSTATE_PREFIXES)
+    if not isinstance(error, APIError):
+        return False
+
+    code = error.code
+    if isinstance(code, int) or (isinstance(code, str) and len(code) == 3 and code.isdigit()):
+        # HTTP status of a response without a PostgREST error body (SQLSTATEs
+        # such as 23503 are digits too, but five of them)
+        status = int(code)
+        return status == 429 or status >= 500
+    if not code:
+        return False
+    return code in TRANSIENT_POSTGREST_CODES or code.startswith(TRANSIENT_SQLSTATE_PREFIXES)
+
+
+class RetryPolicy:
+    """Calls a function, retrying transient failures with jittered exponential backoff."""
+
+    def __init__(
+        self,
+        attempts: int = DEFAULT_RETRY_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Args:
+            attempts: Attempts per call, counting the first one (1 = no retries)
+            base_delay: Backoff ceiling (seconds) before the first retry, doubled per retry
+            max_delay: Upper bound on the backoff ceiling
+            sleep: Waits between attempts (replaceable in benchmarks)
+        """
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def delay(self, retry: int) -> float:
+        """Backoff before retry number `retry` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def call(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        retry_fn: Optional[Callable[..., Any]] = None,
+        describe: Optional[str] = None
+    ) -> Any:
+        """
+        Call fn(*args), retrying transient failures.
+
+        Args:
+            fn: Function to call
+            retry_fn: Called instead of fn on retries, e.g. an idempotent
+                variant of a write that may have been applied before its
+                response was lost
+            describe: What is being called, for the retry messages
+
+        Raises:
+            The last error once the attempts are used up, or the first
+            non-transient error
+        """
+        for attempt in range(self.attempts):
+            try:
+                if attempt and retry_fn is not None:
+                    return retry_fn(*args)
+                return fn(*args)
+            except Exception as e:
+                self.sleep(self._backoff(attempt, e, describe))
+
+    async def call_async(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args,
+        retry_fn: Optional[Callable[..., Awaitable[Any]]] = None,
+        describe: Optional[str] = None
+    ) -> Any:
+        """Await fn(*args) like call(), waiting with asyncio.sleep between attempts."""
+        for attempt in range(self.attempts):
+            try:
+                if attempt and retry_fn is not None:
+                    return await retry_fn(*args)
+                return await fn(*args)
+            except Exception as e:
+                await asyncio.sleep(self._backoff(attempt, e, describe))
+
+    def _backoff(self, attempt: int, error: Exception, describe: Optional[str]) -> float:
+        """Re-raise `error` unless it may be retried, else count the retry and return its delay."""
+        if attempt + 1 >= self.attempts or not is_transient(error):
+            raise error
+        delay = self.delay(attempt)
+        with self._lock:
+            self.retries += 1
+        print(f"  {describe or 'Request'} failed ({str(error)[:80]}), "
+              f"retry {attempt + 1}/{self.attempts - 1} in {delay:.1f}s")
+        return delay
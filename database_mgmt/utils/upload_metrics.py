@@ -0,0 +1,348 @@
+"""
+Instrumentation for uploads: where the wall time goes and what it costs.
+
+UploadMetrics collects, thread-safely:
+
+- per-phase wall and CPU time (phases may repeat and accumulate, e.g. every
+  configuration flush; time spent parsing JSONL inside other phases is
+  measured by wrapping the record iterator),
+- requests per table and operation, with error counts, a latency histogram
+  and bytes sent and received (REST requests are observed through httpx
+  event hooks on the shared client; --pg-dsn reports its statements),
+- id cache lookups per table, hits and misses.
+
+The report is written as JSON and, optionally, in the Prometheus text
+exposition format (e.g. for node_exporter's textfile collector).
+"""
+
+import json
+import time
+import threading
+from pathlib import Path
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prefix of every Prometheus metric name
+PROMETHEUS_PREFIX = 'skylight_upload'
+
+# Request extension holding the send time, read back by the response hook
+_STARTED_AT = 'upload_metrics_started_at'
+
+
+def default_metrics_path(jsonl_path: str) -> Path:
+    """Metrics report kept next to the input: data.jsonl -> data.jsonl.metrics.json"""
+    return Path(f"{jsonl_path}.metrics.json")
+
+
+class RequestStats:
+    """Counters for one (table, operation)."""
+
+    __slots__ = ('count', 'errors', 'latency_sum', 'buckets', 'bytes_sent', 'bytes_received')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        # Per bucket, not cumulative; the last slot counts latencies above every bound
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def add(self, latency: float, bytes_sent: int, bytes_received: int, failed: bool):
+        self.count += 1
+        self.errors += failed
+        self.latency_sum += latency
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        """(upper bound, requests at or below it), ending with +Inf."""
+        bounds = [f"{bound:g}" for bound in LATENCY_BUCKETS] + ['+Inf']
+        total = 0
+        cumulative = []
+        for bound, count in zip(bounds, self.buckets):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'latency_seconds': {
+                'sum': round(self.latency_sum, 6),
+                'mean': round(self.latency_sum / self.count, 6) if self.count else None,
+                'buckets': dict(self.cumulative_buckets()),
+            },
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+        }
+
+
+def describe_rest_request(request: httpx.Request) -> Tuple[str, str]:
+    """(table, operation) of a PostgREST request, from its path, method and Prefer header."""
+    path = urlsplit(str(request.url)).path
+    table = path.rstrip('/').rsplit('/', 1)[-1] or 'unknown'
+    method = request.method
+    if method == 'GET':
+        return table, 'select'
+    if method == 'HEAD':
+        return table, 'count'
+    if method == 'POST':
+        return table, 'upsert' if 'resolution=' in request.headers.get('prefer', '') else 'insert'
+    return table, method.lower()
+
+
+class UploadMetrics:
+    """Thread-safe collector of phase timings, request statistics and cache hit rates."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases: Dict[str, Dict[str, float]] = defaultdict(lambda: {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+        self.requests: Dict[Tuple[str, str], RequestStats] = defaultdict(RequestStats)
+        self.cache_lookups: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self.summary: Dict[str, Any] = {}
+        self.started_at = time.time()
+
+    # Phases
+
+    def add_phase_time(self, name: str, wall: float, cpu: float, calls: int = 1):
+        with self._lock:
+            phase = self.phases[name]
+            phase['wall'] += wall
+            phase['cpu'] += cpu
+            phase['calls'] += calls
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a block as phase `name`, adding to earlier blocks of the same name.
+
+        CPU time is the whole process's (worker threads included) during the block.
+        """
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            self.add_phase_time(name, time.perf_counter() - wall_started, time.process_time() - cpu_started)
+
+    def timed_iter(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yield from `items`, charging the time spent producing them to phase `name`.
+
+        Used for parsing, which runs lazily inside other phases. CPU time is
+        this thread's only, so concurrent file workers are not double-counted.
+        """
+        iterator = iter(items)
+        wall = cpu = 0.0
+        try:
+            while True:
+                wall_started = time.perf_counter()
+                cpu_started = time.thread_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    wall += time.perf_counter() - wall_started
+                    cpu += time.thread_time() - cpu_started
+                yield item
+        finally:
+            self.add_phase_time(name, wall, cpu)
+
+    # Requests
+
+    def record_request(
+        self,
+        table: str,
+        operation: str,
+        latency: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+        failed: bool = False
+    ):
+        """Record one request (or SQL statement) to the database."""
+        with self._lock:
+            self.requests[(table, operation)].add(latency, bytes_sent, bytes_received, failed)
+
+    def instrument_http_client(self, client: Union[httpx.Client, httpx.AsyncClient]):
+        """Observe every request sent through `client` with event hooks."""
+        def on_request(request: httpx.Request):
+            request.extensions[_STARTED_AT] = time.perf_counter()
+
+        def on_response(response: httpx.Response):
+            # Hooks run before the body is read; reading it here is how httpx
+            # exposes its size, and the caller gets the same buffered body
+            response.read()
+            self._record_response(response)
+
+        async def on_request_async(request: httpx.Request):
+            on_request(request)
+
+        async def on_response_async(response: httpx.Response):
+            await response.aread()
+            self._record_response(response)
+
+        hooks = client.event_hooks
+        if isinstance(client, httpx.AsyncClient):
+            hooks['request'].append(on_request_async)
+            hooks['response'].append(on_response_async)
+        else:
+            hooks['request'].append(on_request)
+            hooks['response'].append(on_response)
+        client.event_hooks = hooks
+
+    def _record_response(self, response: httpx.Response):
+        request = response.request
+        started = request.extensions.get(_STARTED_AT)
+        latency = time.perf_counter() - started if started is not None else 0.0
+        table, operation = describe_rest_request(request)
+        try:
+            bytes_sent = len(request.content)
+        except httpx.RequestNotRead:
+            bytes_sent = 0  # Streamed body
+        self.record_request(
+            table, operation, latency,
+            bytes_sent=bytes_sent,
+            bytes_received=len(response.content),
+            failed=response.status_code >= 400
+        )
+
+    # Caches
+
+    def record_cache_lookup(self, table: str, hit: bool):
+        with self._lock:
+            self.cache_lookups[table]['hits' if hit else 'misses'] += 1
+
+    # Reports
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The whole report as JSON-serializable values."""
+        with self._lock:
+            requests: Dict[str, Dict[str, Any]] = defaultdict(dict)
+            for (table, operation), stats in sorted(self.requests.items()):
+                requests[table][operation] = stats.to_dict()
+            caches = {}
+            for table, lookups in sorted(self.cache_lookups.items()):
+                total = lookups['hits'] + lookups['misses']
+                caches[table] = dict(lookups, hit_rate=round(lookups['hits'] / total, 4) if total else None)
+            return {
+                'started_at': self.started_at,
+                'phases': {
+                    name: {
+                        'wall_seconds': round(phase['wall'], 6),
+                        'cpu_seconds': round(phase['cpu'], 6),
+                        'calls': phase['calls'],
+                    }
+                    for name, phase in self.phases.items()
+                },
+                'requests': dict(requests),
+                'totals': {
+                    'requests': sum(stats.count for stats in self.requests.values()),
+                    'errors': sum(stats.errors for stats in self.requests.values()),
+                    'bytes_sent': sum(stats.bytes_sent for stats in self.requests.values()),
+                    'bytes_received': sum(stats.bytes_received for stats in self.requests.values()),
+                },
+                'caches': caches,
+                'summary': dict(self.summary),
+            }
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+            f.write('\n')
+
+    def to_prometheus(self) -> str:
+        """The report in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+
+        def sample(name: str, labels: Dict[str, str], value: Any):
+            label_text = ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{label_text}}} {value}")
+
+        with self._lock:
+            phases = {name: dict(phase) for name, phase in self.phases.items()}
+            requests = sorted(self.requests.items())
+            caches = sorted((table, dict(lookups)) for table, lookups in self.cache_lookups.items())
+
+        family('phase_wall_seconds', 'gauge', 'Wall time spent in each upload phase.')
+        for name, phase in phases.items():
+            sample('phase_wall_seconds', {'phase': name}, f"{phase['wall']:.6f}")
+        family('phase_cpu_seconds', 'gauge', 'CPU time spent in each upload phase.')
+        for name, phase in phases.items():
+            sample('phase_cpu_seconds', {'phase': name}, f"{phase['cpu']:.6f}")
+
+        family('requests_total', 'counter', 'Requests sent to the database, by table and operation.')
+        for (table, operation), stats in requests:
+            sample('requests_total', {'table': table, 'operation': operation}, stats.count)
+        family('request_errors_total', 'counter', 'Requests answered with an error status.')
+        for (table, operation), stats in requests:
+            sample('request_errors_total', {'table': table, 'operation': operation}, stats.errors)
+        family('request_duration_seconds', 'histogram', 'Request latency.')
+        for (table, operation), stats in requests:
+            labels = {'table': table, 'operation': operation}
+            for bound, count in stats.cumulative_buckets():
+                sample('request_duration_seconds_bucket', dict(labels, le=bound), count)
+            sample('request_duration_seconds_sum', labels, f"{stats.latency_sum:.6f}")
+            sample('request_duration_seconds_count', labels, stats.count)
+        family('request_bytes_sent_total', 'counter', 'Request body bytes sent.')
+        for (table, operation), stats in requests:
+            sample('request_bytes_sent_total', {'table': table, 'operation': operation}, stats.bytes_sent)
+        family('request_bytes_received_total', 'counter', 'Response body bytes received.')
+        for (table, operation), stats in requests:
+            sample('request_bytes_received_total', {'table': table, 'operation': operation}, stats.bytes_received)
+
+        family('cache_lookups_total', 'counter', 'Id cache lookups, by table and result.')
+        for table, lookups in caches:
+            sample('cache_lookups_total', {'table': table, 'result': 'hit'}, lookups['hits'])
+            sample('cache_lookups_total', {'table': table, 'result': 'miss'}, lookups['misses'])
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+
+    def describe(self) -> List[str]:
+        """Short per-phase and per-table lines for the upload summary."""
+        report = self.to_dict()
+        lines = [
+            f"{name}: {phase['wall_seconds']:.2f}s wall, {phase['cpu_seconds']:.2f}s CPU"
+            + (f" ({phase['calls']} times)" if phase['calls'] > 1 else '')
+            for name, phase in report['phases'].items()
+        ]
+        for table, operations in report['requests'].items():
+            for operation, stats in operations.items():
+                mean = stats['latency_seconds']['mean'] or 0
+                line = f"{table} {operation}: {stats['count']} requests, {mean * 1000:.1f} ms mean"
+                if stats['bytes_sent'] or stats['bytes_received']:
+                    line += f", {stats['bytes_sent']:,} bytes sent, {stats['bytes_received']:,} received"
+                if stats['errors']:
+                    line += f", {stats['errors']} failed"
+                lines.append(line)
+        if report['caches']:
+            lines.append("id cache hit rates: " + ', '.join(
+                f"{table} {lookups['hit_rate']:.0%}" for table, lookups in report['caches'].items()
+            ))
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
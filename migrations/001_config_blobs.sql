@@ -0,0 +1,23 @@
+-- Content-addressed configuration params for upload.py --config-blobs
+-- (see database_mgmt/utils/config_blobs.py).
+--
+-- Brings a database created from an earlier DB_Schema.md up to date; safe to
+-- run again. Databases created from the current DB_Schema.md already have it.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS config_blobs (
+    hash TEXT PRIMARY KEY,
+    params JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE configurations
+    ADD COLUMN IF NOT EXISTS params_hash TEXT REFERENCES config_blobs(hash);
+
+CREATE INDEX IF NOT EXISTS idx_configurations_params_hash ON configurations(params_hash);
+
+COMMIT;
+
+-- Make PostgREST pick up the new table and column without a restart
+NOTIFY pgrst, 'reload schema';
@@ -6,9 +6,14 @@ This helps identify where the 500 errors are coming from.
 
 import os
 import sys
+from pathlib import Path
+
+# Pooled client factory shared with the database_mgmt scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'database_mgmt'))
 
 try:
-    from supabase import create_client, Client
+    from supabase import Client
+    from utils.http_client import create_supabase_client
 except ImportError:
     print("Error: supabase-py not installed. Run: pip install supabase")
     sys.exit(1)
@@ -28,7 +33,7 @@ def test_supabase_connection():
     print(f"🔗 Connecting to: {supabase_url}\n")
     
     try:
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase: Client = create_supabase_client(supabase_url, supabase_key)
         print("✅ Supabase client created successfully\n")
     except Exception as e:
         print(f"❌ Failed to create Supabase client: {e}")